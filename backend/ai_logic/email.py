@@ -1,12 +1,30 @@
+import json
+
 from services.llm_client import call_llm
+from services.token_budget import estimate_tokens
 
 MAX_BODY_CHARS = 2000
 MAX_ATTACHMENT_CHARS = 1000
 
 
-def summarize_email_logic(body: str, sender: str, subject: str = "", attachments: str = ""):
+def fallback_summary(body: str, subject: str = "") -> str:
+    """
+    Cheap summary used when the LLM call fails
+    """
+    if body:
+        return f"It's about {body[:80]}..."
+    elif subject:
+        return f"Email about: {subject}"
+    else:
+        return "Email received."
+
+
+def summarize_email_logic(body: str, sender: str, subject: str = "", attachments: str = "", fallback: bool = True):
     """
     Summarize email body and attachments in a natural, conversational way
+
+    With fallback=False, LLM errors are raised instead of being replaced by
+    fallback_summary, so callers can avoid caching a degraded result.
     """
 
     # ---- TRUNCATION (THIS WAS THE ISSUE) ----
@@ -51,9 +69,137 @@ Quick summary:
         return summary.strip()
     except Exception as e:
         print(f"LLM error: {e}")
-        if body:
-            return f"It's about {body[:80]}..."
-        elif subject:
-            return f"Email about: {subject}"
+        if not fallback:
+            raise
+        return fallback_summary(body, subject)
+
+# ============================ BATCH SUMMARIES ============================
+
+# Prompt tokens per batched request; keeps each call well inside Groq's
+# per-minute token limit for llama-3.1-8b-instant
+BATCH_TOKEN_BUDGET = 6000
+BATCH_MAX_EMAILS = 20
+OUTPUT_TOKENS_PER_EMAIL = 90
+
+# Tighter per-email limits than single summaries, so more emails fit a batch
+BATCH_BODY_CHARS = 1200
+BATCH_ATTACHMENT_CHARS = 600
+
+BATCH_SYSTEM_PROMPT = """You're a friendly email assistant. You receive a JSON object with a list of emails.
+Summarize each email naturally and conversationally in 1–2 sentences, mentioning key points from the body and any attachments. No links, no tech talk.
+Reply with a JSON object of the form {"summaries": [{"id": "<email id>", "summary": "<summary>"}]} containing every email id exactly once."""
+
+
+def _clip(text: str, limit: int) -> str:
+    if text and len(text) > limit:
+        return text[:limit] + "...(truncated)"
+    return text or ""
+
+
+def pack_batches(items, token_budget: int = BATCH_TOKEN_BUDGET, max_emails: int = BATCH_MAX_EMAILS):
+    """
+    Greedily group (key, block) pairs so each batch's estimated prompt stays
+    under token_budget. An email too large on its own gets its own batch.
+    """
+    overhead = estimate_tokens(BATCH_SYSTEM_PROMPT)
+    batches, current, used = [], [], overhead
+
+    for key, block in items:
+        cost = estimate_tokens(json.dumps(block, ensure_ascii=False))
+        if current and (used + cost > token_budget or len(current) >= max_emails):
+            batches.append(current)
+            current, used = [], overhead
+        current.append((key, block))
+        used += cost
+
+    if current:
+        batches.append(current)
+    return batches
+
+
+def parse_batch_summaries(content: str, keys) -> dict:
+    """
+    Map a batch reply back to its short keys. Unknown ids and empty
+    summaries are dropped; raises ValueError if the reply is not JSON.
+    """
+    data = json.loads(content)
+
+    entries = data.get("summaries", []) if isinstance(data, dict) else data
+    if isinstance(entries, dict):
+        entries = [{"id": k, "summary": v} for k, v in entries.items()]
+
+    results = {}
+    for entry in entries:
+        if not isinstance(entry, dict):
+            continue
+        key = str(entry.get("id", "")).strip()
+        summary = entry.get("summary")
+        if key in keys and isinstance(summary, str) and summary.strip():
+            results[key] = summary.strip()
+
+    return results
+
+
+def summarize_emails_batch(emails, fallback: bool = True) -> dict:
+    """
+    Summarize several emails with one LLM call per batch instead of one per email
+
+    emails is a list of {"id", "from", "subject", "body", "attachments"}.
+    Emails are sent under short keys ("1", "2", ...) in a JSON prompt and the
+    reply is mapped back to message ids. Emails missing from the reply, or
+    whose whole batch failed, are retried with summarize_email_logic.
+
+    Returns a dict of message id -> summary. With fallback=False, emails whose
+    retry also fails are left out instead of getting fallback_summary.
+    """
+    by_key = {str(idx): email for idx, email in enumerate(emails, 1)}
+    items = [
+        (key, {
+            "id": key,
+            "from": email.get("from", ""),
+            "subject": email.get("subject", ""),
+            "body": _clip(email.get("body", ""), BATCH_BODY_CHARS),
+            "attachments": _clip(email.get("attachments", ""), BATCH_ATTACHMENT_CHARS)
+        })
+        for key, email in by_key.items()
+    ]
+
+    results = {}
+    for batch in pack_batches(items):
+        keys = {key for key, _ in batch}
+
+        if len(batch) > 1:
+            print(f"\n=== Summarizing {len(batch)} emails in one request ===")
+            try:
+                content = call_llm(
+                    json.dumps({"emails": [block for _, block in batch]}, ensure_ascii=False),
+                    system_prompt=BATCH_SYSTEM_PROMPT,
+                    max_tokens=OUTPUT_TOKENS_PER_EMAIL * len(batch) + 50,
+                    json_output=True
+                )
+                parsed = parse_batch_summaries(content, keys)
+            except Exception as e:
+                print(f"Batch summary failed, summarizing one by one: {e}")
+                parsed = {}
         else:
-            return "Email received."
+            parsed = {}
+
+        for key in keys:
+            email = by_key[key]
+            if key in parsed:
+                results[email["id"]] = parsed[key]
+                continue
+
+            try:
+                results[email["id"]] = summarize_email_logic(
+                    body=email.get("body", ""),
+                    sender=email.get("from", ""),
+                    subject=email.get("subject", ""),
+                    attachments=email.get("attachments", ""),
+                    fallback=fallback
+                )
+            except Exception:
+                # fallback=False: the caller decides what to show
+                continue
+
+    return results
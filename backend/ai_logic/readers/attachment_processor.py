@@ -1,14 +1,77 @@
+import itertools
+import multiprocessing
 import os
-from ai_logic.readers.pdf_reader import extract_text_from_pdf
-from ai_logic.readers.word_reader import extract_text_from_docx
-from ai_logic.readers.excel_reader import extract_text_from_xlsx
-from ai_logic.readers.csv_reader import extract_text_from_csv
-from ai_logic.readers.image_reader import extract_text_from_image
+import signal
+import threading
+import time
 
+from ai_logic.readers.guards import (
+    ExtractionSkipped,
+    check_size,
+    check_zip,
+    cpu_budget,
+    init_worker
+)
+from ai_logic.readers.ocr_metrics import record as record_ocr
+from ai_logic.readers.registry import detect_kind, get_reader, register
+from ai_logic.readers.attachment_store import get_cached_extraction, save_extraction
+from services.progress import report_progress
 
-def process_attachment(file_path, filename):
+# Characters of extracted text kept per attachment
+TEXT_CHAR_BUDGET = 1500
+IMAGE_CHAR_BUDGET = 1000
+
+# Summarise spreadsheets per column instead of dumping the first rows
+SPREADSHEET_PROFILE = True
+
+# PDF tables through pdfplumber: "auto" only on pages with ruling lines,
+# True on every page, False never
+PDF_TABLES = "auto"
+
+# Reader modules are imported on first use, not when the app starts
+register(
+    "pdf", "PDF",
+    "ai_logic.readers.pdf_reader", "extract_text_from_pdf",
+    # Stops after the page that crosses the budget
+    {"max_chars": TEXT_CHAR_BUDGET, "tables": PDF_TABLES},
+    # Scanned pages are OCR'd
+    stats=True
+)
+register(
+    "docx", "Word Document",
+    "ai_logic.readers.word_reader", "extract_text_from_docx",
+    {"max_chars": TEXT_CHAR_BUDGET}
+)
+register(
+    "xlsx", "Excel Spreadsheet",
+    "ai_logic.readers.excel_reader", "extract_text_from_xlsx",
+    {"max_rows": 20, "max_chars": TEXT_CHAR_BUDGET, "profile": SPREADSHEET_PROFILE}
+)
+register(
+    "csv", "CSV File",
+    "ai_logic.readers.csv_reader", "extract_text_from_csv",
+    {"max_rows": 20, "max_chars": TEXT_CHAR_BUDGET, "profile": SPREADSHEET_PROFILE}
+)
+register(
+    "image", "Image",
+    "ai_logic.readers.image_reader", "extract_text_from_image",
+    {"max_chars": IMAGE_CHAR_BUDGET},
+    stats=True
+)
+
+# Kinds stored as zip containers, checked for decompression bombs
+ZIP_KINDS = {"docx", "xlsx"}
+
+
+def process_attachment(source, filename, mime_type=None):
     """
     Process an attachment and extract text based on file type
+
+    source is either a file path or the attachment bytes (bytes or
+    memoryview), so attachments can be processed without touching disk.
+    The type is detected from the content, so mislabeled files still reach
+    the right reader; filename and mime_type only break ties. Files the
+    guards refuse come back as a "Skipped" result.
     
     Returns:
         dict with 'filename', 'type', and 'content'
@@ -17,86 +80,319 @@ def process_attachment(file_path, filename):
     extension = os.path.splitext(filename)[1].lower()
     
     try:
-        if extension == '.pdf':
-            content = extract_text_from_pdf(file_path)
-            # Limit PDF content to first 1500 chars
-            content = content[:1500] if len(content) > 1500 else content
-            return {
-                "filename": filename,
-                "type": "PDF",
-                "content": content,
-                "truncated": len(extract_text_from_pdf(file_path)) > 1500
-            }
-        
-        elif extension == '.docx':
-            content = extract_text_from_docx(file_path)
-            # Limit Word content
-            content = content[:1500] if len(content) > 1500 else content
-            return {
-                "filename": filename,
-                "type": "Word Document",
-                "content": content,
-                "truncated": len(extract_text_from_docx(file_path)) > 1500
-            }
-        
-        elif extension == '.xlsx':
-            content = extract_text_from_xlsx(file_path, max_rows=20)  # Reduced rows
-            return {
-                "filename": filename,
-                "type": "Excel Spreadsheet",
-                "content": content,
-                "truncated": False
-            }
-        
-        elif extension == '.csv':
-            content = extract_text_from_csv(file_path, max_rows=20)  # Reduced rows
-            return {
-                "filename": filename,
-                "type": "CSV File",
-                "content": content,
-                "truncated": False
-            }
-        
-        elif extension in ['.png', '.jpg', '.jpeg']:
-            content = extract_text_from_image(file_path)
-            # Limit image OCR content
-            content = content[:1000] if len(content) > 1000 else content
-            return {
-                "filename": filename,
-                "type": "Image",
-                "content": content,
-                "truncated": len(extract_text_from_image(file_path)) > 1000
-            }
-        
-        else:
+        check_size(source)
+
+        kind = detect_kind(source, filename, mime_type)
+        reader = get_reader(kind)
+
+        if reader is None:
             return {
                 "filename": filename,
                 "type": "Unsupported",
-                "content": f"File type {extension} not supported",
+                "content": f"File type {extension or mime_type or 'unknown'} not supported",
                 "truncated": False
             }
-    
-    except Exception as e:
-        return {
+
+        if kind in ZIP_KINDS:
+            check_zip(source)
+
+        stats = [] if reader.stats else None
+        content, truncated = reader(source, stats=stats)
+
+        result = {
             "filename": filename,
-            "type": "Error",
-            "content": f"Error processing file: {str(e)}",
-            "truncated": False
+            "type": reader.label,
+            "content": content,
+            "truncated": truncated
         }
+        if stats:
+            result["ocr"] = stats
+        return result
+
+    except ExtractionSkipped as e:
+        return _skipped_result(filename, e.reason)
+    
+    except Exception as e:
+        return _error_result(filename, str(e))
+
+
+# ============================ PROCESS POOL ============================
+
+# Worker processes for extraction; 0 runs extraction inline on the caller's thread
+MAX_WORKERS = int(os.environ.get("ATTACHMENT_WORKERS", min(4, os.cpu_count() or 1)))
+
+# Wall-clock limit per attachment, counted from when a worker starts on it
+ATTACHMENT_TIMEOUT_SECONDS = float(os.environ.get("ATTACHMENT_TIMEOUT_SECONDS", 30))
+
+# Wall-clock limit for all of one call's attachments, time in the queue included
+ATTACHMENT_REQUEST_TIMEOUT_SECONDS = float(
+    os.environ.get("ATTACHMENT_REQUEST_TIMEOUT_SECONDS", 2 * ATTACHMENT_TIMEOUT_SECONDS)
+)
+
+# How often the watchdog looks for stuck or dead workers
+WATCHDOG_INTERVAL_SECONDS = 0.1
+
+_pool = None
+_pool_lock = threading.Lock()
+
+# Set in each worker: ("start", pid, token, started) / ("done", pid, token) go to the watchdog
+_worker_events = None
+
+# pid -> (token, started) for every worker busy on an attachment
+_running = {}
+
+# Tokens a caller is still waiting on, and why the watchdog gave up on them
+_waiting = set()
+_failed = {}
+
+# Notified when a task finishes or the watchdog fails one
+_state = threading.Condition()
+
+_tokens = itertools.count()
+
+
+def _init_pool_worker(events):
+    global _worker_events
+    _worker_events = events
+    init_worker()
+
+
+def _process_in_worker(token, deadline, source, filename, mime_type=None):
+    """
+    Pool entry point: process_attachment under the per-file CPU budget.
+    Tells the watchdog when it starts and finishes, so the file's timeout
+    only counts time actually spent on it. A task whose caller has already
+    stopped waiting is dropped unparsed. time.monotonic() is system-wide,
+    so the deadline compares across processes.
+    """
+    if time.monotonic() >= deadline:
+        return _skipped_result(filename, "caller stopped waiting")
+
+    pid = os.getpid()
+    _worker_events.put(("start", pid, token, time.monotonic()))
+    try:
+        with cpu_budget():
+            return process_attachment(source, filename, mime_type)
+    finally:
+        _worker_events.put(("done", pid, token))
+
+
+def _get_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # forkserver/spawn avoid forking a multi-threaded web worker
+            methods = multiprocessing.get_all_start_methods()
+            context = multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+            # SimpleQueue writes synchronously, so "start" arrives even if the
+            # worker then holds the GIL inside a C extension
+            events = context.SimpleQueue()
+            # multiprocessing.Pool replaces a killed worker and keeps serving
+            # the other tasks; a ProcessPoolExecutor would break as a whole
+            _pool = context.Pool(
+                MAX_WORKERS,
+                initializer=_init_pool_worker,
+                initargs=(events,)
+            )
+            threading.Thread(target=_watchdog, args=(events,), daemon=True).start()
+        return _pool
+
+
+def _worker_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def _fail(token, reason):
+    # Called with _state held
+    if token in _waiting:
+        _failed[token] = reason
+        _state.notify_all()
+
+
+def _watchdog(events):
+    """
+    Tracks which worker runs which attachment. A worker that spends more
+    than ATTACHMENT_TIMEOUT_SECONDS on one file is killed on its own; the
+    pool starts a replacement and files on the other workers, whichever
+    request they belong to, carry on. A worker that died by itself (e.g.
+    at its memory limit) fails the file it was running.
+    """
+    while True:
+        while not events.empty():
+            message = events.get()
+            with _state:
+                if message[0] == "start":
+                    _, pid, token, started = message
+                    _running[pid] = (token, started)
+                elif _running.get(message[1], (None,))[0] == message[2]:
+                    del _running[message[1]]
+
+        now = time.monotonic()
+        with _state:
+            for pid, (token, started) in list(_running.items()):
+                if now - started > ATTACHMENT_TIMEOUT_SECONDS:
+                    del _running[pid]
+                    try:
+                        os.kill(pid, signal.SIGKILL)
+                    except ProcessLookupError:
+                        pass
+                    _fail(token, f"extraction timed out after {ATTACHMENT_TIMEOUT_SECONDS:g}s")
+                elif not _worker_alive(pid):
+                    del _running[pid]
+                    _fail(token, "extraction worker crashed")
+
+        time.sleep(WATCHDOG_INTERVAL_SECONDS)
+
+
+def _notify(_):
+    with _state:
+        _state.notify_all()
+
+
+def _error_result(filename, message):
+    return {
+        "filename": filename,
+        "type": "Error",
+        "content": f"Error processing file: {message}",
+        "truncated": False
+    }
+
+
+def _skipped_result(filename, reason):
+    return {
+        "filename": filename,
+        "type": "Skipped",
+        "content": f"Skipped: {reason}",
+        "truncated": False,
+        "skipped": True,
+        "reason": reason
+    }
+
+
+def _extract_in_pool(jobs):
+    """
+    Run process_attachment for {index: (source, filename, mime_type)} in the
+    process pool, returning {index: result}. Each file gets
+    ATTACHMENT_TIMEOUT_SECONDS once a worker picks it up, and the call as a
+    whole waits at most ATTACHMENT_REQUEST_TIMEOUT_SECONDS; files not done
+    by then are skipped instead of holding the request.
+    """
+    pool = _get_pool()
+    deadline = time.monotonic() + ATTACHMENT_REQUEST_TIMEOUT_SECONDS
+
+    tasks = {}
+    with _state:
+        for idx, (source, filename, mime_type) in jobs.items():
+            token = next(_tokens)
+            _waiting.add(token)
+            # memoryviews cannot be pickled across the process boundary
+            if isinstance(source, memoryview):
+                source = bytes(source)
+            tasks[idx] = (token, pool.apply_async(
+                _process_in_worker,
+                (token, deadline, source, filename, mime_type),
+                callback=_notify,
+                error_callback=_notify
+            ))
+
+    results = {}
+    try:
+        with _state:
+            while True:
+                for idx, (token, task) in tasks.items():
+                    if idx in results:
+                        continue
+                    filename = jobs[idx][1]
+                    if task.ready():
+                        try:
+                            results[idx] = task.get()
+                        except Exception as e:
+                            results[idx] = _error_result(filename, str(e) or type(e).__name__)
+                    elif token in _failed:
+                        results[idx] = _skipped_result(filename, _failed[token])
+
+                remaining = deadline - time.monotonic()
+                if len(results) == len(tasks) or remaining <= 0:
+                    break
+                _state.wait(remaining)
+    finally:
+        with _state:
+            for token, _ in tasks.values():
+                _waiting.discard(token)
+                _failed.pop(token, None)
+
+    for idx in tasks:
+        if idx not in results:
+            results[idx] = _skipped_result(
+                jobs[idx][1],
+                f"extraction did not finish within {ATTACHMENT_REQUEST_TIMEOUT_SECONDS:g}s"
+            )
+
+    return results
 
 
 def process_all_attachments(attachments):
     """
     Process multiple attachments and return their contents
+
+    Attachments from the content-addressed store carry a sha256; their
+    extraction result is cached, so a file is parsed once however many
+    messages or users it appears in. Cache misses are extracted in parallel
+    in a bounded process pool with a per-file timeout.
     """
-    processed = []
+    processed = [None] * len(attachments)
+    jobs = {}
     
-    for attachment in attachments:
-        result = process_attachment(
-            attachment['path'],
-            attachment['filename']
-        )
-        processed.append(result)
+    for idx, attachment in enumerate(attachments):
+        sha256 = attachment.get('sha256')
+
+        cached = get_cached_extraction(sha256, attachment['filename'], attachment.get('mime_type')) if sha256 else None
+        if cached is not None:
+            processed[idx] = cached
+            continue
+
+        if attachment.get('skipped'):
+            # Refused before download (e.g. over the size limit)
+            processed[idx] = _skipped_result(attachment['filename'], attachment['skipped'])
+            continue
+
+        source = attachment.get('data')
+        if source is None:
+            source = attachment.get('path')
+
+        if source is None:
+            processed[idx] = _error_result(
+                attachment['filename'],
+                "attachment content is no longer cached"
+            )
+        else:
+            report_progress(f"Reading {attachment['filename']}")
+            jobs[idx] = (source, attachment['filename'], attachment.get('mime_type'))
+
+    if MAX_WORKERS > 0:
+        results = _extract_in_pool(jobs) if jobs else {}
+    else:
+        results = {
+            idx: process_attachment(source, filename, mime_type)
+            for idx, (source, filename, mime_type) in jobs.items()
+        }
+
+    for idx, result in results.items():
+        # OCR stats come back from the worker; count them in this process
+        for image_stats in result.pop('ocr', None) or []:
+            record_ocr(image_stats)
+
+        sha256 = attachments[idx].get('sha256')
+        if sha256:
+            source, filename, mime_type = jobs[idx]
+            save_extraction(sha256, source, filename, mime_type, result)
+        processed[idx] = result
     
     return processed
 
@@ -111,7 +407,10 @@ def create_attachment_summary(processed_attachments):
     summary_parts = ["\n\n=== ATTACHMENTS ==="]
     
     for idx, att in enumerate(processed_attachments, 1):
-        if att['content'] and not att['content'].startswith('Error') and not att['content'].startswith('File type'):
+        if att.get('skipped'):
+            summary_parts.append(f"\n--- Attachment {idx}: {att['filename']} ---")
+            summary_parts.append(f"[Not read: {att['reason']}]")
+        elif att['content'] and not att['content'].startswith('Error') and not att['content'].startswith('File type'):
             summary_parts.append(f"\n--- Attachment {idx}: {att['filename']} ({att['type']}) ---")
             summary_parts.append(att['content'])
             if att.get('truncated'):
@@ -123,22 +422,3 @@ def create_attachment_summary(processed_attachments):
     
     return "\n".join(summary_parts)
 
-
-def cleanup_attachments(attachments):
-    """
-    Delete temporary attachment files
-    """
-    for attachment in attachments:
-        try:
-            if os.path.exists(attachment['path']):
-                os.remove(attachment['path'])
-        except Exception as e:
-            print(f"Error cleaning up {attachment['filename']}: {str(e)}")
-    
-    # Clean up temp directory if empty
-    try:
-        temp_dir = "temp_attachments"
-        if os.path.exists(temp_dir) and not os.listdir(temp_dir):
-            os.rmdir(temp_dir)
-    except Exception as e:
-        print(f"Error cleaning up temp directory: {str(e)}")
\ No newline at end of file
@@ -0,0 +1,136 @@
+import hashlib
+import os
+import uuid
+
+from ai_logic.readers.registry import hinted_kind, sniff
+from db import (
+    get_attachment_ref,
+    save_attachment_ref,
+    evict_attachment_blobs,
+    get_attachment_extraction,
+    save_attachment_extraction
+)
+
+# Blobs are only written to disk when a store directory is configured.
+# By default attachments flow from the Gmail response to the readers in
+# memory, and only refs and extraction results are kept (in SQLite).
+STORE_DIR = os.environ.get("ATTACHMENT_STORE_DIR")
+
+USER_QUOTA_BYTES = 100 * 1024 * 1024
+MAX_STORE_BYTES = 1024 * 1024 * 1024
+MAX_AGE_SECONDS = 7 * 24 * 60 * 60
+
+
+def blob_path(sha256):
+    return os.path.join(STORE_DIR, sha256[:2], sha256)
+
+
+def lookup_attachment(user_email, message_id, filename, size):
+    """
+    Return {"filename", "sha256"} (plus "path" for persisted blobs) for an
+    attachment seen earlier, or None if it has to be downloaded.
+
+    Without a persisted blob the attachment only counts as available while
+    its extraction result is cached.
+    """
+    sha256 = get_attachment_ref(user_email, message_id, filename, size)
+    if not sha256:
+        return None
+
+    attachment = {"filename": filename, "sha256": sha256}
+
+    if STORE_DIR and os.path.exists(blob_path(sha256)):
+        attachment["path"] = blob_path(sha256)
+        return attachment
+
+    if any(get_attachment_extraction(key) for key in extraction_keys(sha256, filename)):
+        return attachment
+
+    return None
+
+
+def store_attachment(user_email, message_id, filename, size, data):
+    """
+    Register attachment bytes under their sha256 and return
+    {"filename", "sha256", "data"} (plus "path" when blobs are persisted).
+    Identical files (across messages and users) share one blob and one
+    extraction result.
+    """
+    sha256 = hashlib.sha256(data).hexdigest()
+    attachment = {"filename": filename, "sha256": sha256, "data": data}
+
+    if STORE_DIR:
+        path = blob_path(sha256)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        attachment["path"] = path
+
+    save_attachment_ref(user_email, message_id, filename, size, sha256)
+    evict(user_email)
+
+    return attachment
+
+
+def evict(user_email):
+    """
+    Apply the per-user quota and the store's size/age limits, deleting
+    blobs that are no longer referenced.
+    """
+    orphans = evict_attachment_blobs(
+        user_email,
+        user_quota=USER_QUOTA_BYTES,
+        max_total=MAX_STORE_BYTES,
+        max_age=MAX_AGE_SECONDS
+    )
+
+    if not STORE_DIR:
+        return
+
+    for sha256 in orphans:
+        try:
+            os.remove(blob_path(sha256))
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            print(f"Error evicting attachment {sha256}: {str(e)}")
+
+
+def _hinted_key(sha256, filename, mime_type=None):
+    return f"{sha256}:{hinted_kind(filename, mime_type) or ''}"
+
+
+def extraction_key(sha256, filename, mime_type, source):
+    """
+    The reader is chosen by magic bytes, so content they identify (PDF,
+    docx, images...) is cached under its sha256 alone and is not parsed
+    again under another name. Plain text is read according to the
+    filename or MIME type, so that hint is part of its key.
+    """
+    if sniff(source) not in (None, "text"):
+        return sha256
+    return _hinted_key(sha256, filename, mime_type)
+
+
+def extraction_keys(sha256, filename, mime_type=None):
+    # Lookups happen before the bytes are at hand, so both forms are tried
+    return [sha256, _hinted_key(sha256, filename, mime_type)]
+
+
+def get_cached_extraction(sha256, filename, mime_type=None):
+    for key in extraction_keys(sha256, filename, mime_type):
+        result = get_attachment_extraction(key)
+        if result:
+            result["filename"] = filename
+            return result
+    return None
+
+
+def save_extraction(sha256, source, filename, mime_type, result):
+    # Errors and skips (timeouts, crashed workers) may not recur; retry them
+    if result.get("type") in ("Error", "Skipped"):
+        return
+    save_attachment_extraction(extraction_key(sha256, filename, mime_type, source), result)
@@ -1,43 +1,127 @@
+import codecs
 import csv
+from itertools import islice
 
-def extract_text_from_csv(file_path, max_rows=50):
+from ai_logic.readers.sources import open_text, byte_view, clip
+from ai_logic.readers.table_profile import profile_table
+
+# Prefix used to detect encoding and dialect
+SNIFF_BYTES = 64 * 1024
+
+# Newlines are counted over the memory-mapped file this many bytes at a time
+COUNT_CHUNK = 1024 * 1024
+
+BOMS = [
+    (codecs.BOM_UTF8, "utf-8-sig"),
+    (codecs.BOM_UTF16_LE, "utf-16"),
+    (codecs.BOM_UTF16_BE, "utf-16"),
+]
+
+
+def detect_encoding(prefix: bytes) -> str:
+    for bom, encoding in BOMS:
+        if prefix.startswith(bom):
+            return encoding
+
+    try:
+        # final=False tolerates a multi-byte character cut off at the end
+        codecs.getincrementaldecoder("utf-8")().decode(prefix, final=False)
+        return "utf-8"
+    except UnicodeDecodeError:
+        return "latin-1"
+
+
+def count_lines(data, encoding: str) -> int:
+    """
+    Count lines with a chunked newline scan; memory stays at COUNT_CHUNK.
+    """
+    newline = b"\n"
+    if encoding == "utf-16":
+        newline = b"\n\x00" if data[:2] == codecs.BOM_UTF16_LE else b"\x00\n"
+
+    total = len(data)
+    lines = 0
+    step = COUNT_CHUNK - COUNT_CHUNK % len(newline)
+    for start in range(0, total, step):
+        lines += data[start:start + step].count(newline)
+
+    if total and data[total - len(newline):total] != newline:
+        lines += 1
+
+    return lines
+
+
+def sniff_dialect(sample: str):
+    try:
+        return csv.Sniffer().sniff(sample, delimiters=",;\t|")
+    except csv.Error:
+        return csv.excel
+
+
+def extract_text_from_csv(source, max_rows=50, max_chars=None, profile=False):
     """
     Extract text from CSV with better formatting
+
+    source is a file path or the CSV bytes. Only the header and the sampled
+    rows are parsed; the row count comes from a newline scan over the
+    memory-mapped file, so memory stays bounded whatever the file size.
+    The count is approximate if quoted fields contain newlines.
+
+    With profile=True the file is streamed once and summarised per column
+    (type, nulls, min/max/mean, top values) instead of sampled; very large
+    files get a partial profile of their first rows.
+
+    Returns:
+        (text, truncated)
     """
     text = []
 
     try:
-        with open(file_path, newline="", encoding="utf-8", errors="ignore") as f:
-            reader = csv.reader(f)
-            rows = list(reader)
-
-            if not rows:
-                return "[Empty CSV file]"
-
-            # Headers
-            headers = rows[0]
-            text.append("Columns: " + ", ".join(str(h).strip() for h in headers if h))
-            
-            # Count total rows
-            total_rows = len(rows) - 1
-            rows_to_show = min(max_rows, total_rows)
-            text.append(f"Showing {rows_to_show} of {total_rows} rows:\n")
-
-            # Data rows
-            data_count = 0
-            for row in rows[1:max_rows + 1]:
-                if not any(row):
-                    continue
-                text.append(" | ".join(str(cell).strip() for cell in row if cell))
-                data_count += 1
-            
-            if data_count == 0:
-                text.append("[No data rows found]")
-            
-            if total_rows > max_rows:
-                text.append(f"\n[{total_rows - max_rows} more rows not shown]")
+        with byte_view(source) as data:
+            prefix = data[:SNIFF_BYTES]
+            if not prefix.strip():
+                return "[Empty CSV file]", False
+
+            encoding = detect_encoding(prefix)
+            dialect = sniff_dialect(prefix.decode(encoding, errors="ignore"))
+            line_count = count_lines(data, encoding)
+
+        with open_text(source, encoding=encoding) as f:
+            reader = csv.reader(f, dialect)
+            headers = next(reader, None)
+
+            if not headers:
+                return "[Empty CSV file]", False
+
+            if profile:
+                return clip(profile_table(headers, reader, total_rows=line_count - 1), max_chars)
+
+            sample = list(islice(reader, max_rows))
+            exhausted = len(sample) < max_rows or next(reader, None) is None
+
+        # Headers
+        text.append("Columns: " + ", ".join(str(h).strip() for h in headers if h))
+        
+        # Count total rows
+        total_rows = len(sample) if exhausted else max(line_count - 1, len(sample))
+        rows_to_show = min(max_rows, total_rows)
+        text.append(f"Showing {rows_to_show} of {total_rows} rows:\n")
+
+        # Data rows
+        data_count = 0
+        for row in sample:
+            if not any(row):
+                continue
+            text.append(" | ".join(str(cell).strip() for cell in row if cell))
+            data_count += 1
+        
+        if data_count == 0:
+            text.append("[No data rows found]")
+        
+        if total_rows > max_rows:
+            text.append(f"\n[{total_rows - max_rows} more rows not shown]")
 
     except Exception as e:
-        return f"[ERROR reading CSV: {str(e)}]"
+        return f"[ERROR reading CSV: {str(e)}]", False
 
-    return "\n".join(text)
\ No newline at end of file
+    return clip("\n".join(text), max_chars)
@@ -1,13 +1,23 @@
 from openpyxl import load_workbook
 
-def extract_text_from_xlsx(file_path, max_rows=20, max_sheets=3):
+from ai_logic.readers.sources import as_binary_file, clip
+from ai_logic.readers.table_profile import profile_table
+
+def extract_text_from_xlsx(source, max_rows=20, max_sheets=3, max_chars=None, profile=False):
     """
     Extract text from Excel file with limits
+
+    source is a file path or the workbook bytes. With profile=True each
+    sheet is streamed once in read-only mode and summarised per column
+    instead of showing the first max_rows rows.
+
+    Returns:
+        (text, truncated)
     """
     text = []
 
     try:
-        wb = load_workbook(file_path, data_only=True, read_only=True)
+        wb = load_workbook(as_binary_file(source), data_only=True, read_only=True)
         
         # Limit number of sheets processed
         sheets_to_process = list(wb.worksheets)[:max_sheets]
@@ -15,6 +25,17 @@ def extract_text_from_xlsx(file_path, max_rows=20, max_sheets=3):
         for sheet_idx, sheet in enumerate(sheets_to_process):
             text.append(f"\n=== Sheet: {sheet.title} ===")
 
+            if profile:
+                row_iter = sheet.iter_rows(values_only=True)
+                headers = next(row_iter, None)
+                if headers is None:
+                    text.append("[Empty sheet]")
+                else:
+                    # max_row comes from the sheet's dimension record and may be missing
+                    total_rows = sheet.max_row - 1 if sheet.max_row else None
+                    text.append(profile_table(headers, row_iter, total_rows=total_rows))
+                continue
+
             rows = list(sheet.iter_rows(values_only=True, max_row=max_rows + 1))
             if not rows:
                 text.append("[Empty sheet]")
@@ -46,6 +67,6 @@ def extract_text_from_xlsx(file_path, max_rows=20, max_sheets=3):
         wb.close()
 
     except Exception as e:
-        return f"[ERROR reading Excel file: {str(e)}]"
+        return f"[ERROR reading Excel file: {str(e)}]", False
 
-    return "\n".join(text)
\ No newline at end of file
+    return clip("\n".join(text), max_chars)
\ No newline at end of file
@@ -0,0 +1,144 @@
+import os
+import signal
+import zipfile
+from contextlib import contextmanager
+
+from ai_logic.readers.sources import as_binary_file, byte_view
+
+# resource limits are POSIX only; elsewhere the wall-clock timeout still applies
+try:
+    import resource
+except ImportError:
+    resource = None
+
+# Largest attachment downloaded or parsed at all
+MAX_ATTACHMENT_BYTES = int(os.environ.get("ATTACHMENT_MAX_BYTES", 15 * 1024 * 1024))
+
+# Zip containers (docx/xlsx): limits on what the reader would inflate
+MAX_ZIP_ENTRIES = 5000
+MAX_ZIP_ENTRY_BYTES = 50 * 1024 * 1024
+MAX_ZIP_TOTAL_BYTES = 200 * 1024 * 1024
+MAX_COMPRESSION_RATIO = 100
+
+# Per-file CPU seconds and per-worker address space in the extraction pool
+CPU_SECONDS = int(os.environ.get("ATTACHMENT_CPU_SECONDS", 20))
+MEMORY_LIMIT_MB = int(os.environ.get("ATTACHMENT_MEMORY_MB", 2048))
+
+
+class ExtractionSkipped(BaseException):
+    """
+    A guard refused or aborted an extraction. Derives from BaseException so
+    the readers' own "except Exception" handlers do not swallow it.
+    """
+
+    def __init__(self, reason):
+        super().__init__(reason)
+        self.reason = reason
+
+
+def _megabytes(size):
+    return f"{size / (1024 * 1024):.1f} MB"
+
+
+def size_limit_reason(size):
+    """
+    Reason an attachment of size bytes is too large, or None.
+    """
+    if size and size > MAX_ATTACHMENT_BYTES:
+        return f"file is {_megabytes(size)}, limit is {_megabytes(MAX_ATTACHMENT_BYTES)}"
+    return None
+
+
+def check_size(source):
+    with byte_view(source) as view:
+        reason = size_limit_reason(len(view))
+    if reason:
+        raise ExtractionSkipped(reason)
+
+
+def check_zip(source):
+    """
+    Refuse zip bombs before a docx/xlsx reader inflates them: checks entry
+    count, declared uncompressed sizes and the compression ratio from the
+    central directory, without decompressing anything.
+    """
+    try:
+        with zipfile.ZipFile(as_binary_file(source)) as archive:
+            entries = archive.infolist()
+    except zipfile.BadZipFile:
+        # Let the reader report the corrupt file
+        return
+
+    if len(entries) > MAX_ZIP_ENTRIES:
+        raise ExtractionSkipped(f"archive has {len(entries)} entries")
+
+    total = compressed = 0
+    for entry in entries:
+        if entry.file_size > MAX_ZIP_ENTRY_BYTES:
+            raise ExtractionSkipped(f"{entry.filename} inflates to {_megabytes(entry.file_size)}")
+        total += entry.file_size
+        compressed += entry.compress_size
+
+    if total > MAX_ZIP_TOTAL_BYTES:
+        raise ExtractionSkipped(f"archive inflates to {_megabytes(total)}")
+
+    if compressed and total / compressed > MAX_COMPRESSION_RATIO:
+        raise ExtractionSkipped(f"compression ratio {total / compressed:.0f}:1 looks like a zip bomb")
+
+# ============================ WORKER LIMITS ============================
+
+# Seconds of the cpu_budget in force, None outside an extraction
+_active_budget = None
+
+
+def _cpu_exceeded(signum, frame):
+    if _active_budget:
+        raise ExtractionSkipped(f"CPU budget of {_active_budget}s exceeded")
+
+
+def init_worker():
+    """
+    Pool worker initializer: caps the worker's address space so a
+    decompression or image bomb fails with MemoryError instead of swapping
+    the host, and turns SIGXCPU into ExtractionSkipped.
+    """
+    if resource is None:
+        return
+
+    if MEMORY_LIMIT_MB > 0:
+        limit = MEMORY_LIMIT_MB * 1024 * 1024
+        _, hard = resource.getrlimit(resource.RLIMIT_AS)
+        if hard != resource.RLIM_INFINITY:
+            limit = min(limit, hard)
+        resource.setrlimit(resource.RLIMIT_AS, (limit, hard))
+
+    signal.signal(signal.SIGXCPU, _cpu_exceeded)
+
+
+@contextmanager
+def cpu_budget(seconds=CPU_SECONDS):
+    """
+    Limit the CPU time of one extraction in a pool worker. RLIMIT_CPU counts
+    the whole process, so the soft limit is set relative to what the worker
+    has used so far and restored afterwards. Code stuck inside a C extension
+    only sees the signal on return; the wall-clock timeout covers that.
+    """
+    global _active_budget
+
+    if resource is None or not seconds:
+        yield
+        return
+
+    soft, hard = resource.getrlimit(resource.RLIMIT_CPU)
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    limit = int(usage.ru_utime + usage.ru_stime + seconds) + 1
+    if hard != resource.RLIM_INFINITY:
+        limit = min(limit, hard)
+
+    resource.setrlimit(resource.RLIMIT_CPU, (limit, hard))
+    _active_budget = seconds
+    try:
+        yield
+    finally:
+        _active_budget = None
+        resource.setrlimit(resource.RLIMIT_CPU, (soft, hard))
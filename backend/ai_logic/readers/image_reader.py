@@ -1,34 +1,39 @@
 from PIL import Image
 import pytesseract
 
-def extract_text_from_image(image_path):
+from ai_logic.readers.ocr import ocr_image
+from ai_logic.readers.sources import as_binary_file, clip
+
+def extract_text_from_image(source, max_chars=None, stats=None):
     """
     Extract text from image using OCR
+
+    source is a file path or the image bytes. Images unlikely to contain
+    text (tiny logos, flat or edge-free images) are skipped without OCR;
+    stats, if given, is a list that receives {"skipped", "reason", "ocr_ms"}.
+
+    Returns:
+        (text, truncated)
     """
     try:
-        image = Image.open(image_path)
-        
-        # Convert to RGB if needed (some images are RGBA, CMYK, etc.)
-        if image.mode != 'RGB':
-            image = image.convert('RGB')
+        image = Image.open(as_binary_file(source))
 
-        # Improve OCR accuracy
-        custom_config = r"--oem 3 --psm 6"
+        image_stats = {}
+        text = ocr_image(image, image_stats)
+        if stats is not None:
+            stats.append(image_stats)
 
-        text = pytesseract.image_to_string(
-            image,
-            lang="eng",
-            config=custom_config
-        )
+        if image_stats["skipped"]:
+            return f"[Image skipped: {image_stats['reason']}, likely no text]", False
         
         extracted_text = text.strip()
         
         if not extracted_text:
-            return "[No text detected in image]"
+            return "[No text detected in image]", False
         
-        return extracted_text
+        return clip(extracted_text, max_chars)
 
     except pytesseract.TesseractNotFoundError:
-        return "[ERROR: Tesseract OCR not installed. Please install it to read images.]"
+        return "[ERROR: Tesseract OCR not installed. Please install it to read images.]", False
     except Exception as e:
-        return f"[ERROR reading image: {str(e)}]"
\ No newline at end of file
+        return f"[ERROR reading image: {str(e)}]", False
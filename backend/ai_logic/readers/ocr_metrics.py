@@ -0,0 +1,34 @@
+import threading
+
+# OCR counters live apart from the OCR engine so the web process can report
+# them without importing PIL or tesseract
+
+_metrics = {"images": 0, "skipped": 0, "ocr_runs": 0, "ocr_ms": 0.0}
+_metrics_lock = threading.Lock()
+
+
+def record(stats):
+    """
+    Add the stats of one image or scanned PDF page ({"skipped": bool,
+    "ocr_ms": float}) to the process-wide counters. Called in the web
+    process, since extraction itself may run in a worker process.
+    """
+    with _metrics_lock:
+        _metrics["images"] += 1
+        if stats.get("skipped"):
+            _metrics["skipped"] += 1
+        else:
+            _metrics["ocr_runs"] += 1
+            _metrics["ocr_ms"] += stats.get("ocr_ms", 0.0)
+
+
+def get_ocr_metrics():
+    with _metrics_lock:
+        metrics = dict(_metrics)
+
+    average_ms = metrics["ocr_ms"] / metrics["ocr_runs"] if metrics["ocr_runs"] else 0.0
+    metrics["ocr_ms"] = round(metrics["ocr_ms"], 1)
+    metrics["avg_ocr_ms"] = round(average_ms, 1)
+    # Estimate: each skipped image would have cost an average OCR run
+    metrics["ocr_ms_saved"] = round(metrics["skipped"] * average_ms, 1)
+    return metrics
@@ -0,0 +1,156 @@
+import os
+import threading
+
+from ai_logic.readers.sources import as_binary_file
+
+# Default engine for the text layer; pdfplumber is used for table
+# structure and as the fallback when PDFium is unavailable
+DEFAULT_BACKEND = os.environ.get("PDF_BACKEND", "pdfium")
+
+# Vector paths (ruling lines, cell borders) on a page from which it is
+# treated as holding a table; pdfplumber's table finder needs those lines
+TABLE_MIN_RULES = 8
+
+# PDFium is not thread-safe: every call into pypdfium2 in this process,
+# including pdfplumber's page rendering, holds this lock. Matters when
+# extraction runs inline on the web server's threads (ATTACHMENT_WORKERS=0).
+_pdfium_lock = threading.RLock()
+
+
+def _as_pdf_input(source):
+    if isinstance(source, memoryview):
+        return source.tobytes()
+    return source
+
+
+class PdfiumBackend:
+    """
+    Raw text layer through PDFium (pypdfium2, already a pdfplumber
+    dependency). No layout analysis, so it is much faster than pdfplumber.
+    """
+
+    name = "pdfium"
+
+    def __init__(self, source):
+        import pypdfium2 as pdfium
+
+        with _pdfium_lock:
+            self.pdf = pdfium.PdfDocument(_as_pdf_input(source))
+
+    def __len__(self):
+        with _pdfium_lock:
+            return len(self.pdf)
+
+    def page_text(self, index):
+        with _pdfium_lock:
+            page = self.pdf[index]
+            try:
+                textpage = page.get_textpage()
+                try:
+                    return textpage.get_text_range()
+                finally:
+                    textpage.close()
+            finally:
+                page.close()
+
+    def has_ruled_table(self, index):
+        """
+        Cheap table check: counts path objects on the page, stopping at
+        TABLE_MIN_RULES, without any layout analysis.
+        """
+        import pypdfium2.raw as pdfium_c
+
+        with _pdfium_lock:
+            page = self.pdf[index]
+            try:
+                rules = 0
+                # Raw calls: the object wrappers cost more than the check
+                for i in range(pdfium_c.FPDFPage_CountObjects(page.raw)):
+                    obj = pdfium_c.FPDFPage_GetObject(page.raw, i)
+                    if pdfium_c.FPDFPageObj_GetType(obj) == pdfium_c.FPDF_PAGEOBJ_PATH:
+                        rules += 1
+                        if rules >= TABLE_MIN_RULES:
+                            return True
+                return False
+            finally:
+                page.close()
+
+    def page_image(self, index, scale=2):
+        with _pdfium_lock:
+            page = self.pdf[index]
+            try:
+                return page.render(scale=scale).to_pil()
+            finally:
+                page.close()
+
+    def close(self):
+        with _pdfium_lock:
+            self.pdf.close()
+
+
+class PdfplumberBackend:
+    """
+    Character-level layout analysis; slower, but recovers table structure.
+    """
+
+    name = "pdfplumber"
+
+    def __init__(self, source, tables=False):
+        import pdfplumber
+
+        self.pdf = pdfplumber.open(as_binary_file(source))
+        self.tables = tables
+
+    def __len__(self):
+        return len(self.pdf.pages)
+
+    def page_text(self, index):
+        text = self.pdf.pages[index].extract_text() or ""
+        if self.tables:
+            # Tables first: the character budget cuts from the end
+            text = self.page_tables(index) + text
+        return text
+
+    def page_tables(self, index):
+        """
+        Tables on the page, one row per line with " | " between cells.
+        """
+        text = ""
+        for table in self.pdf.pages[index].extract_tables():
+            rows = [" | ".join(cell.strip() for cell in row if cell) for row in table]
+            text += "\n".join(row for row in rows if row) + "\n"
+        return text
+
+    def has_ruled_table(self, index):
+        page = self.pdf.pages[index]
+        return len(page.lines) + len(page.rects) >= TABLE_MIN_RULES
+
+    def page_image(self, index, scale=2):
+        # pdfplumber renders through pypdfium2
+        with _pdfium_lock:
+            return self.pdf.pages[index].to_image(resolution=72 * scale).original
+
+    def close(self):
+        self.pdf.close()
+
+
+BACKENDS = {
+    PdfiumBackend.name: PdfiumBackend,
+    PdfplumberBackend.name: PdfplumberBackend,
+}
+
+
+def open_pdf(source, tables=False, backend=None):
+    """
+    Open a PDF with the requested backend: pdfplumber with table extraction
+    when tables=True, otherwise DEFAULT_BACKEND (falling back to pdfplumber
+    if PDFium is unavailable).
+    """
+    if tables is True:
+        return PdfplumberBackend(source, tables=True)
+
+    name = backend or DEFAULT_BACKEND
+    try:
+        return BACKENDS[name](source)
+    except ImportError:
+        return PdfplumberBackend(source)
@@ -1,30 +1,83 @@
 import warnings
 import logging
-import pdfplumber
+
+from ai_logic.readers.pdf_backends import PdfplumberBackend, open_pdf
 
 warnings.filterwarnings("ignore")
 logging.getLogger("pdfminer").setLevel(logging.ERROR)
 
-def extract_text_from_pdf(path, max_pages=5):
+# Pages without a text layer (scans) that may be OCR'd per document
+OCR_PAGE_BUDGET = 2
+
+def extract_text_from_pdf(source, max_pages=5, max_chars=None, tables="auto", backend=None, stats=None):
     """
     Extract text from PDF, limiting to first few pages for efficiency
+
+    source is a file path or the PDF bytes. Text comes from the fast
+    text-layer backend; tables=True reads every page with pdfplumber's
+    table extraction instead, and tables="auto" adds pdfplumber's table
+    rows only for pages with ruling lines. Pages with no text layer are
+    OCR'd, up to OCR_PAGE_BUDGET pages, and stats (a list) receives their
+    OCR stats. Reading stops after the page that crosses max_chars.
+
+    Returns:
+        (text, truncated)
     """
     text = ""
+    truncated = False
     try:
-        with pdfplumber.open(path) as pdf:
+        pdf = open_pdf(source, tables=tables, backend=backend)
+        # pdfplumber, opened on the first page that looks like a table
+        table_pdf = None
+        try:
+            page_count = len(pdf)
             # Limit pages to avoid huge PDFs
-            pages_to_read = min(len(pdf.pages), max_pages)
+            pages_to_read = min(page_count, max_pages)
+            ocr_pages = 0
             
             for page_num in range(pages_to_read):
-                page_text = pdf.pages[page_num].extract_text()
+                page_text = pdf.page_text(page_num)
+
+                if tables == "auto" and pdf.has_ruled_table(page_num):
+                    if table_pdf is None:
+                        table_pdf = pdf if pdf.name == PdfplumberBackend.name else PdfplumberBackend(source)
+                    # Tables first: the character budget cuts from the end
+                    page_text = table_pdf.page_tables(page_num) + page_text
+
+                # Scanned page: no text layer, fall back to OCR
+                if not page_text.strip() and ocr_pages < OCR_PAGE_BUDGET:
+                    ocr_pages += 1
+                    try:
+                        from ai_logic.readers.ocr import ocr_image
+                        page_stats = {}
+                        page_text = ocr_image(pdf.page_image(page_num), page_stats)
+                        if stats is not None:
+                            stats.append(page_stats)
+                    except Exception as e:
+                        print(f"OCR failed on PDF page {page_num + 1}: {e}")
+
                 if page_text:
                     text += page_text + "\n"
+
+                if max_chars and len(text) > max_chars:
+                    truncated = True
+                    break
             
             # Indicate if there are more pages
-            if len(pdf.pages) > max_pages:
-                text += f"\n[Note: PDF has {len(pdf.pages)} total pages, only first {max_pages} extracted]"
+            if page_count > max_pages:
+                truncated = True
+                text += f"\n[Note: PDF has {page_count} total pages, only first {max_pages} extracted]"
+        finally:
+            if table_pdf is not None and table_pdf is not pdf:
+                table_pdf.close()
+            pdf.close()
                 
     except Exception as e:
-        return f"[ERROR reading PDF: {str(e)}]"
+        return f"[ERROR reading PDF: {str(e)}]", False
+
+    # Collapse whitespace within lines; line breaks keep table rows apart
+    text = "\n".join(" ".join(line.split()) for line in text.splitlines() if line.strip())
+    if max_chars and len(text) > max_chars:
+        return text[:max_chars], True
 
-    return " ".join(text.split())
\ No newline at end of file
+    return text, truncated
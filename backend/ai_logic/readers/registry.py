@@ -0,0 +1,167 @@
+import importlib
+import os
+import struct
+import threading
+import zipfile
+
+from ai_logic.readers.sources import as_binary_file, byte_view
+
+# Bytes inspected for magic numbers and to tell text from binary
+SNIFF_BYTES = 8192
+
+# ============================ DETECTION ============================
+
+IMAGE_SIGNATURES = [
+    b"\x89PNG\r\n\x1a\n",
+    b"\xff\xd8\xff",
+    b"GIF87a",
+    b"GIF89a",
+    b"II*\x00",
+    b"MM\x00*",
+]
+
+# "BM" alone also starts plenty of text, so a BMP must carry a known DIB
+# header size at offset 14 as well
+BMP_DIB_HEADER_SIZES = {12, 40, 52, 56, 64, 108, 124}
+
+EXTENSIONS = {
+    ".pdf": "pdf",
+    ".docx": "docx",
+    ".xlsx": "xlsx",
+    ".csv": "csv",
+    ".png": "image",
+    ".jpg": "image",
+    ".jpeg": "image",
+}
+
+MIME_TYPES = {
+    "application/pdf": "pdf",
+    "application/vnd.openxmlformats-officedocument.wordprocessingml.document": "docx",
+    "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet": "xlsx",
+    "text/csv": "csv",
+    "image/png": "image",
+    "image/jpeg": "image",
+}
+
+
+def _zip_kind(source):
+    """
+    docx and xlsx are both zip containers; only the central directory is
+    read to tell them apart.
+    """
+    try:
+        with zipfile.ZipFile(as_binary_file(source)) as archive:
+            names = set(archive.namelist())
+    except zipfile.BadZipFile:
+        return None
+
+    if "word/document.xml" in names:
+        return "docx"
+    if "xl/workbook.xml" in names:
+        return "xlsx"
+    return None
+
+
+def _is_bmp(head):
+    if not head.startswith(b"BM") or len(head) < 18:
+        return False
+    return struct.unpack_from("<I", head, 14)[0] in BMP_DIB_HEADER_SIZES
+
+
+def sniff(source):
+    """
+    Identify content from its leading bytes. Returns a reader kind, "text"
+    for NUL-free content that no signature matches, or None.
+    """
+    with byte_view(source) as view:
+        head = view[:SNIFF_BYTES]
+
+    # The PDF header may be preceded by junk bytes
+    if b"%PDF-" in head[:1024]:
+        return "pdf"
+
+    if head.startswith(b"PK\x03\x04"):
+        return _zip_kind(source)
+
+    if any(head.startswith(signature) for signature in IMAGE_SIGNATURES) or _is_bmp(head):
+        return "image"
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "image"
+
+    if head and b"\x00" not in head:
+        return "text"
+
+    return None
+
+
+def hinted_kind(filename, mime_type=None):
+    """
+    Kind named by the file extension or, failing that, the MIME type.
+    """
+    extension = os.path.splitext(filename)[1].lower()
+    return EXTENSIONS.get(extension) or MIME_TYPES.get((mime_type or "").lower())
+
+
+def detect_kind(source, filename, mime_type=None):
+    """
+    Pick the reader for an attachment. Magic bytes win over the filename
+    and MIME type, which only decide between readers for plain text or
+    when the content is not recognised.
+
+    Returns a registered kind or None when unsupported.
+    """
+    hinted = hinted_kind(filename, mime_type)
+
+    kind = sniff(source)
+
+    if kind == "text":
+        return "csv" if hinted == "csv" else None
+
+    return kind or hinted
+
+# ============================ REGISTRY ============================
+
+class Reader:
+    """
+    A reader function named by module path, imported on first use so that
+    pdfium, openpyxl, python-docx, PIL and tesseract are only loaded by the
+    processes that actually read such a file.
+    """
+
+    def __init__(self, kind, label, module, function, options=None, stats=False):
+        self.kind = kind
+        self.label = label
+        self.module = module
+        self.function = function
+        self.options = options or {}
+        # Reader accepts a stats list, filled with one OCR stats dict per
+        # image it considered, that is returned with the result
+        self.stats = stats
+        self._extract = None
+
+    def load(self):
+        if self._extract is None:
+            with _load_lock:
+                if self._extract is None:
+                    module = importlib.import_module(self.module)
+                    self._extract = getattr(module, self.function)
+        return self._extract
+
+    def __call__(self, source, stats=None):
+        options = dict(self.options)
+        if self.stats:
+            options["stats"] = stats if stats is not None else []
+        return self.load()(source, **options)
+
+
+READERS = {}
+_load_lock = threading.Lock()
+
+
+def register(kind, label, module, function, options=None, stats=False):
+    READERS[kind] = Reader(kind, label, module, function, options, stats)
+    return READERS[kind]
+
+
+def get_reader(kind):
+    return READERS.get(kind)
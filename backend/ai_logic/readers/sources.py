@@ -0,0 +1,80 @@
+import io
+import mmap
+import os
+from contextlib import contextmanager
+
+
+def as_binary_file(source):
+    """
+    Readers accept either a filesystem path or the attachment itself as
+    bytes / bytearray / memoryview. Paths are passed through untouched and
+    in-memory data is wrapped in a BytesIO, so nothing is written to disk.
+    """
+    if isinstance(source, (str, os.PathLike)):
+        return source
+
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return io.BytesIO(source)
+
+    # Already a file-like object
+    return source
+
+
+def open_text(source, encoding="utf-8"):
+    """
+    Open a path or in-memory attachment as a text stream for csv parsing.
+    """
+    if isinstance(source, (str, os.PathLike)):
+        return open(source, newline="", encoding=encoding, errors="ignore")
+
+    return io.TextIOWrapper(
+        as_binary_file(source),
+        newline="",
+        encoding=encoding,
+        errors="ignore"
+    )
+
+
+@contextmanager
+def byte_view(source):
+    """
+    Random-access bytes for a path or in-memory attachment without reading a
+    file into memory: paths are memory-mapped, bytes are used as they are.
+    Slices of the view are bytes.
+    """
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, "rb") as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                yield b""
+                return
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                yield mapped
+        return
+
+    if isinstance(source, memoryview):
+        source = source.cast("B")
+        # memoryview slices are views; expose bytes slices like the other cases
+        yield _BytesSlicer(source)
+        return
+
+    yield source
+
+
+class _BytesSlicer:
+    def __init__(self, view):
+        self.view = view
+
+    def __len__(self):
+        return len(self.view)
+
+    def __getitem__(self, key):
+        return self.view[key].tobytes()
+
+
+def clip(text, max_chars=None):
+    """
+    Apply a reader's character budget: returns (text, truncated).
+    """
+    if max_chars and len(text) > max_chars:
+        return text[:max_chars], True
+    return text, False
@@ -0,0 +1,213 @@
+import re
+import time
+from collections import Counter
+from datetime import date, datetime, timezone
+
+# Most frequent values reported per text column
+TOP_VALUES = 3
+
+# Distinct values tracked per column before top values become approximate
+MAX_TRACKED_VALUES = 1000
+
+# Profiling is pure Python (~30 us per row); both caps keep one table well
+# inside the extraction CPU budget, and what is left is reported as partial
+MAX_PROFILE_ROWS = 200_000
+MAX_PROFILE_SECONDS = 5.0
+
+# Rows between checks of the time cap
+TIME_CHECK_ROWS = 1000
+
+# Rows shown verbatim next to the profile
+SAMPLE_ROWS = 3
+
+THOUSANDS = re.compile(r"^-?\d{1,3}(,\d{3})+(\.\d+)?$")
+
+
+def _is_null(value):
+    return value is None or (isinstance(value, str) and not value.strip())
+
+
+def _comparable_date(value):
+    """
+    Naive UTC datetime, so dates, naive and timezone-aware datetimes from
+    one column can be compared.
+    """
+    if not isinstance(value, datetime):
+        return datetime(value.year, value.month, value.day)
+    if value.tzinfo is not None:
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def _parse(value):
+    """
+    Map a cell to (kind, comparable value). CSV cells arrive as strings, so
+    numbers and ISO dates are recognised from text as well.
+    """
+    if isinstance(value, bool):
+        return "bool", value
+    if isinstance(value, (int, float)):
+        return "number", value
+    if isinstance(value, (datetime, date)):
+        return "date", _comparable_date(value)
+
+    text = str(value).strip()
+    if THOUSANDS.match(text):
+        text = text.replace(",", "")
+    try:
+        return "number", float(text)
+    except ValueError:
+        pass
+
+    if 8 <= len(text) <= 26 and text[:4].isdigit() and text[4] == "-":
+        try:
+            return "date", _comparable_date(datetime.fromisoformat(text))
+        except ValueError:
+            pass
+
+    if text.lower() in ("true", "false"):
+        return "bool", text.lower() == "true"
+
+    return "text", text
+
+
+class ColumnProfile:
+    """
+    Running aggregates for one column, updated one cell at a time.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.count = 0
+        self.nulls = 0
+        self.kinds = Counter()
+        self.minimum = {}
+        self.maximum = {}
+        self.total = 0.0
+        self.values = Counter()
+        self.overflow = False
+
+    def add(self, value):
+        self.count += 1
+        if _is_null(value):
+            self.nulls += 1
+            return
+
+        kind, parsed = _parse(value)
+        self.kinds[kind] += 1
+
+        if kind in ("number", "date"):
+            if kind not in self.minimum or parsed < self.minimum[kind]:
+                self.minimum[kind] = parsed
+            if kind not in self.maximum or parsed > self.maximum[kind]:
+                self.maximum[kind] = parsed
+            if kind == "number":
+                self.total += parsed
+
+        if kind in ("text", "bool"):
+            key = str(parsed)
+            if key in self.values or len(self.values) < MAX_TRACKED_VALUES:
+                self.values[key] += 1
+            else:
+                self.overflow = True
+
+    def kind(self):
+        if not self.kinds:
+            return "empty"
+        kind, hits = self.kinds.most_common(1)[0]
+        mixed = hits < sum(self.kinds.values())
+        return f"{kind}, mixed" if mixed else kind
+
+    def describe(self):
+        null_ratio = self.nulls / self.count if self.count else 0.0
+        parts = [f"{self.kind()}, {null_ratio:.0%} null"]
+        dominant = self.kinds.most_common(1)[0][0] if self.kinds else None
+
+        if dominant == "number":
+            numbers = self.kinds["number"]
+            parts.append(
+                f"min {_fmt(self.minimum['number'])}, max {_fmt(self.maximum['number'])}, "
+                f"mean {_fmt(self.total / numbers)}"
+            )
+        elif dominant == "date":
+            parts.append(f"{_fmt(self.minimum['date'])} to {_fmt(self.maximum['date'])}")
+        elif self.values:
+            seen = sum(self.values.values())
+            distinct = f"{len(self.values)}+" if self.overflow else str(len(self.values))
+            top = ", ".join(
+                f"{_shorten(value)} ({hits / seen:.0%})"
+                for value, hits in self.values.most_common(TOP_VALUES)
+            )
+            parts.append(f"{distinct} distinct, top: {top}")
+
+        return f"- {self.name or '(unnamed)'} ({'; '.join(parts)})"
+
+
+def _fmt(value):
+    if isinstance(value, float):
+        return f"{value:.4g}" if abs(value) < 1e6 else f"{value:.3e}"
+    if isinstance(value, datetime) and not (value.hour or value.minute or value.second):
+        return value.date().isoformat()
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return str(value)
+
+
+def _shorten(value, limit=30):
+    return value if len(value) <= limit else value[:limit - 3] + "..."
+
+
+def profile_table(headers, rows, total_rows=None):
+    """
+    Stream rows once and return a compact text profile: row count and, per
+    column, type, null ratio, min/max/mean or top values, plus a few sample rows.
+
+    Profiling stops after MAX_PROFILE_ROWS rows or MAX_PROFILE_SECONDS; the
+    profile is then marked partial and total_rows, when the caller knows it
+    (e.g. from a newline scan), is reported as the table's size.
+    """
+    headers = [str(h).strip() if h is not None else "" for h in headers]
+    columns = [ColumnProfile(h) for h in headers]
+    samples = []
+    row_count = 0
+    capped = False
+    stop_at = time.perf_counter() + MAX_PROFILE_SECONDS
+
+    for row in rows:
+        if not any(not _is_null(cell) for cell in row):
+            continue
+
+        if row_count >= MAX_PROFILE_ROWS or (
+            row_count % TIME_CHECK_ROWS == 0 and row_count and time.perf_counter() > stop_at
+        ):
+            capped = True
+            break
+
+        row_count += 1
+        if len(row) > len(columns):
+            columns.extend(ColumnProfile("") for _ in range(len(row) - len(columns)))
+
+        for idx, column in enumerate(columns):
+            column.add(row[idx] if idx < len(row) else None)
+
+        if len(samples) < SAMPLE_ROWS:
+            samples.append(" | ".join(
+                _fmt(c) if isinstance(c, (datetime, date)) else str(c).strip()
+                for c in row if not _is_null(c)
+            ))
+
+    if capped and total_rows and total_rows > row_count:
+        lines = [f"Rows: ~{total_rows} (partial profile of the first {row_count})"]
+    elif capped:
+        lines = [f"Rows: {row_count}+ (partial profile of the first {row_count})"]
+    else:
+        lines = [f"Rows: {row_count}"]
+
+    lines.append("Columns:")
+    lines.extend(column.describe() for column in columns)
+
+    if samples:
+        lines.append("Sample rows:")
+        lines.extend(samples)
+
+    return "\n".join(lines)
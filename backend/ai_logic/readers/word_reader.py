@@ -1,14 +1,31 @@
 from docx import Document
 
-def extract_text_from_docx(file_path):
+from ai_logic.readers.sources import as_binary_file
+
+def extract_text_from_docx(source, max_chars=None):
+    """
+    Extract paragraphs and tables from a .docx path or its bytes,
+    stopping once max_chars characters have been collected
+
+    Returns:
+        (text, truncated)
+    """
     try:
-        doc = Document(file_path)
+        doc = Document(as_binary_file(source))
         text = []
+        length = 0
+
+        def add(line):
+            nonlocal length
+            text.append(line)
+            length += len(line) + 1
+            return bool(max_chars) and length > max_chars
 
         # Extract normal paragraphs
         for para in doc.paragraphs:
             if para.text and para.text.strip():
-                text.append(para.text.strip())
+                if add(para.text.strip()):
+                    return "\n".join(text)[:max_chars], True
 
         # Extract tables (important for reports/invoices)
         for table in doc.tables:
@@ -18,10 +35,10 @@ def extract_text_from_docx(file_path):
                     for cell in row.cells
                     if cell.text.strip()
                 ]
-                if row_text:
-                    text.append(" | ".join(row_text))
+                if row_text and add(" | ".join(row_text)):
+                    return "\n".join(text)[:max_chars], True
 
-        return "\n".join(text)
+        return "\n".join(text), False
 
     except Exception as e:
-        return f"[ERROR reading document: {str(e)}]"
+        return f"[ERROR reading document: {str(e)}]", False
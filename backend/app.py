@@ -1,17 +1,22 @@
 # app.py — InboxAI (PURE LLM-FIRST)
 
+import asyncio
+import functools
+import json
 import os
 import traceback
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse
 from starlette.middleware.sessions import SessionMiddleware
-from services.gmail_client import get_unread_emails
-from ai_logic.readers.attachment_processor import (
-    process_all_attachments,
-    create_attachment_summary
+from db import (
+    init_db,
+    save_conversation,
+    get_conversation_history,
+    get_summary_cache_stats
 )
-from db import init_db, save_conversation, get_conversation_history
 init_db()
 
 # ===================== IMPORTS =====================
@@ -25,18 +30,48 @@ from models import (
 from services.auth import auth_router
 from services.gmail_client import (
     get_gmail_service,
-    get_unread_emails,
+    summarize_unread,
+    DEPTH_FULL,
+    get_new_emails,
+    count_unread_from_sender,
     send_email,
     get_credentials_for_user
 )
-from services.gmail_client import summarize_email
+from ai_logic.readers.ocr_metrics import get_ocr_metrics
+from services.attachment_context import get_attachment_context
+from services.progress import progress_listener
 
 from services.calendar_client import create_meeting
 from services.draft_service import generate_email_drafts
-from services.llm_client import intelligent_command_handler
+from services.llm_client import (
+    intelligent_command_handler,
+    answer_from_attachment,
+    get_llm_cache_stats
+)
+
+# ===================== BLOCKING WORK =====================
+# Gmail (googleapiclient), Groq, OCR and SQLite calls are all synchronous.
+# They run on this pool so a slow request never blocks the event loop.
+BLOCKING_WORKERS = int(os.environ.get("BLOCKING_WORKERS", 32))
+
+blocking_pool = ThreadPoolExecutor(
+    max_workers=BLOCKING_WORKERS,
+    thread_name_prefix="inboxai-blocking"
+)
+
+
+async def run_blocking(fn, *args, **kwargs):
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(blocking_pool, functools.partial(fn, *args, **kwargs))
+
+
+@asynccontextmanager
+async def lifespan(app):
+    yield
+    blocking_pool.shutdown(wait=False, cancel_futures=True)
 
 # ===================== APP =====================
-app = FastAPI(title="InboxAI Backend")
+app = FastAPI(title="InboxAI Backend", lifespan=lifespan)
 
 # ===================== MIDDLEWARE =====================
 app.add_middleware(
@@ -56,37 +91,92 @@ app.add_middleware(
 )
 
 # ===================== EMAIL HELPERS =====================
-def get_unread_emails_summary(user_email: str):
+def get_unread_emails_summary(user_email: str, depth: str = None, top_n: int = None):
     creds = get_credentials_for_user(user_email)
-    emails = get_unread_emails(creds)
+    depth = depth or DEPTH_FULL
+    emails = summarize_unread(creds, depth=depth, top_n=top_n or 3, user_email=user_email)
 
     if not emails:
         return {"reply": "You have no unread emails 🎉"}
 
-    service = get_gmail_service(creds)
-    summaries = [summarize_email(service, e["id"]) for e in emails[:3]]
-    return {"reply": "\n\n".join(summaries)}
+    if depth == DEPTH_FULL:
+        return {"reply": "\n\n".join(e["summary"] for e in emails)}
+
+    lines = []
+    for e in emails:
+        line = f"- {e['from']}: {e['subject']}"
+        if e.get("snippet"):
+            line += f" — {e['snippet']}"
+        lines.append(line)
+
+    return {"reply": f"Your {len(emails)} latest unread emails:\n" + "\n".join(lines)}
 
 
 def get_last_email_summary(user_email: str):
     creds = get_credentials_for_user(user_email)
-    emails = get_unread_emails(creds, max_results=1)
+    emails = summarize_unread(creds, depth=DEPTH_FULL, top_n=1, user_email=user_email)
 
     if not emails:
         return {"reply": "You have no unread emails."}
 
-    service = get_gmail_service(creds)
-    return {"reply": summarize_email(service, emails[0]["id"])}
+    return {"reply": emails[0]["summary"]}
+
+
+def get_new_emails_handler(user_email: str):
+    creds = get_credentials_for_user(user_email)
+    changes = get_new_emails(creds, user_email)
+    unread = changes["unread"]
+
+    if changes["full_sync"]:
+        if not unread:
+            return {"reply": "You have no unread emails 🎉", "data": changes}
+        return {
+            "reply": f"You have {changes['unread_count']} unread emails. Latest: "
+                     + "; ".join(f"{m['from']} – {m['subject']}" for m in unread[:3]),
+            "data": changes
+        }
+
+    added = changes["added"]
+    if not added:
+        return {"reply": "Nothing new since you last checked.", "data": changes}
+
+    lines = [f"- {m['from']}: {m['subject']}" for m in added[:5]]
+    if len(added) > 5:
+        lines.append(f"...and {len(added) - 5} more")
+
+    return {
+        "reply": f"{len(added)} new unread emails since you last checked:\n" + "\n".join(lines),
+        "data": changes
+    }
 
 
 def check_emails_from_sender(user_email: str, sender_query: str):
     creds = get_credentials_for_user(user_email)
-    emails = get_unread_emails(creds, query=f"from:{sender_query}")
+    result = count_unread_from_sender(creds, sender_query)
+    count = result["count"]
 
-    if not emails:
+    if not count:
         return {"reply": f"No unread emails from {sender_query}."}
 
-    return {"reply": f"You have {len(emails)} unread emails from {sender_query}."}
+    amount = count if result["exact"] else f"about {count}"
+    return {"reply": f"You have {amount} unread emails from {sender_query}."}
+
+
+def read_email_attachment_handler(user_email: str, question: str):
+    creds = get_credentials_for_user(user_email)
+    context = get_attachment_context(creds, user_email)
+
+    if not context:
+        return {"reply": "I couldn't find an unread email with attachments."}
+
+    return {
+        "reply": answer_from_attachment(question, context["text"]),
+        "data": {
+            "message_id": context["message_id"],
+            "subject": context["subject"],
+            "attachments": context["filenames"]
+        }
+    }
 
 
 def get_unread_email_categories_handler(user_email: str):
@@ -97,6 +187,60 @@ def get_unread_email_categories_handler(user_email: str):
 
 
 # ===================== COMMAND ROUTE =====================
+def run_command(user_email: str, command: str):
+    """
+    The blocking part of /command: tool selection, Gmail/Groq calls and the
+    conversation log. Runs on blocking_pool.
+    """
+    function_map = {
+        "get_unread_emails_summary": lambda **kwargs: get_unread_emails_summary(
+            user_email,
+            kwargs.get("depth"),
+            kwargs.get("top_n")
+        ),
+
+        "get_last_email_summary": lambda **_: get_last_email_summary(user_email),
+
+        "get_new_emails": lambda **_: get_new_emails_handler(user_email),
+
+        "check_emails_from_sender": lambda **kwargs: check_emails_from_sender(
+            user_email,
+            kwargs.get("sender_query")
+        ),
+
+        "read_email_attachment": lambda **kwargs: read_email_attachment_handler(
+            user_email,
+            kwargs.get("question") or command
+        ),
+
+        "get_unread_email_categories": lambda **_: get_unread_email_categories_handler(user_email),
+
+        "create_meeting": lambda **kwargs: {
+            "reply": "Meeting created successfully.",
+            "data": {
+                "meet_link": create_meeting(
+                    creds=get_credentials_for_user(user_email),
+                    **kwargs
+                )
+            }
+        }
+    }
+
+    # Read history before logging this command, so it is not sent twice
+    history = get_conversation_history(user_email)
+    save_conversation(user_email, "user", command)
+
+    result = intelligent_command_handler(
+        user_message=command,
+        function_map=function_map,
+        history=history,
+    )
+
+    save_conversation(user_email, "assistant", result.get("reply", ""))
+
+    return result
+
+
 @app.post("/command")
 async def handle_command(payload: CommandPayload, request: Request):
     try:
@@ -104,59 +248,66 @@ async def handle_command(payload: CommandPayload, request: Request):
         if not user_email:
             raise HTTPException(status_code=401, detail="Not authenticated")
 
-        command = payload.command.strip()
+        return await run_blocking(run_command, user_email, payload.command.strip())
 
-        function_map = {
-    "get_unread_emails_summary": lambda **_: get_unread_emails_summary(user_email),
+    except Exception as e:
+        traceback.print_exc()
+        return {"reply": f"Backend error: {str(e)}"}
 
-    "get_last_email_summary": lambda **_: get_last_email_summary(user_email),
 
-    "check_emails_from_sender": lambda **kwargs: check_emails_from_sender(
-        user_email,
-        kwargs.get("sender_query")
-    ),
+# ===================== STREAMING COMMAND =====================
+def sse_event(event: str, data) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
 
-    "get_unread_email_categories": lambda **_: get_unread_email_categories_handler(user_email),
 
-    "create_meeting": lambda **kwargs: {
-        "reply": "Meeting created successfully.",
-        "data": {
-            "meet_link": create_meeting(
-                creds=get_credentials_for_user(user_email),
-                **kwargs
-            )
-        }
-    }
-}
-        attachment_summary = ""
-        try:
-            creds = get_credentials_for_user(user_email)
-            emails = get_unread_emails(creds, max_results=1)
-
-            if emails and isinstance(emails[0].get("attachments"), list):
-                processed = process_all_attachments(emails[0]["attachments"])
-                attachment_summary = create_attachment_summary(processed)
-        except Exception:
-            attachment_summary = ""
-
-        save_conversation(user_email, "user", command)
-
-        result = intelligent_command_handler(
-    user_message=command,
-    function_map=function_map,  
-    history=get_conversation_history(user_email),
-    attachment_summary=attachment_summary,
-)
+@app.post("/command/stream")
+async def handle_command_stream(payload: CommandPayload, request: Request):
+    """
+    /command over Server-Sent Events: "progress" events while Gmail and
+    attachments are read, "token" events as the LLM writes its reply, then
+    "done" with the same JSON /command returns (or "error").
+    """
+    user_email = request.session.get("user")
+    if not user_email:
+        raise HTTPException(status_code=401, detail="Not authenticated")
 
+    command = payload.command.strip()
+    loop = asyncio.get_running_loop()
+    queue = asyncio.Queue()
 
+    # Called from the worker thread; events keep their order on the loop
+    def emit(event, data):
+        loop.call_soon_threadsafe(queue.put_nowait, (event, data))
 
-        save_conversation(user_email, "assistant", result.get("reply", ""))
+    def work():
+        with progress_listener(
+            on_progress=lambda message: emit("progress", {"message": message}),
+            on_token=lambda text: emit("token", {"text": text})
+        ):
+            return run_command(user_email, command)
 
-        return result
+    async def events():
+        task = asyncio.ensure_future(run_blocking(work))
+        # Queued after every event the worker emitted before returning
+        task.add_done_callback(lambda _: queue.put_nowait(None))
 
-    except Exception as e:
-        traceback.print_exc()
-        return {"reply": f"Backend error: {str(e)}"}
+        while True:
+            item = await queue.get()
+            if item is None:
+                break
+            yield sse_event(*item)
+
+        try:
+            yield sse_event("done", task.result())
+        except Exception as e:
+            traceback.print_exc()
+            yield sse_event("error", {"reply": f"Backend error: {str(e)}"})
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
 
 
 # ===================== EMAIL DRAFT =====================
@@ -166,7 +317,8 @@ async def draft_email(payload: DraftRequest, request: Request):
     if not user_email:
         raise HTTPException(status_code=401, detail="Not authenticated")
 
-    drafts = generate_email_drafts(
+    drafts = await run_blocking(
+        generate_email_drafts,
         intent=payload.intent,
         receiver=payload.receiver,
         tone=payload.tone,
@@ -176,15 +328,19 @@ async def draft_email(payload: DraftRequest, request: Request):
     return {"data": {"drafts": drafts}}
 
 # ===================== SEND EMAIL =====================
+def send_email_for_user(user_email: str, req: SendEmailRequest):
+    creds = get_credentials_for_user(user_email)
+    service = get_gmail_service(creds)
+    return send_email(service, req.to, req.subject, req.body)
+
+
 @app.post("/email/send")
 async def send_email_route(req: SendEmailRequest, request: Request):
     user_email = request.session.get("user")
     if not user_email:
         raise HTTPException(status_code=401, detail="Not authenticated")
 
-    creds = get_credentials_for_user(user_email)
-    service = get_gmail_service(creds)
-    result = send_email(service, req.to, req.subject, req.body)
+    result = await run_blocking(send_email_for_user, user_email, req)
 
     return {"reply": f"Email sent to {req.to}.", "data": result}
 
@@ -199,6 +355,15 @@ def logout(request: Request):
     response.delete_cookie("inboxai_session")
     return response
 
+# ===================== STATS =====================
+@app.get("/stats")
+def stats():
+    return {
+        "summary_cache": get_summary_cache_stats(),
+        "ocr": get_ocr_metrics(),
+        "llm_cache": get_llm_cache_stats()
+    }
+
 # ===================== HEALTH =====================
 @app.get("/")
 def health():
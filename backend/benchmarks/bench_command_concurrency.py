@@ -0,0 +1,87 @@
+"""
+Load test for /command: concurrent requests against the ASGI app, with the
+LLM/Gmail work replaced by a handler that blocks for HANDLER_SECONDS (like
+the synchronous Groq and googleapiclient calls do).
+
+"inline" runs the blocking work on the event loop as /command used to;
+"pool" is the current run_blocking path.
+
+Run from backend/:  python -m benchmarks.bench_command_concurrency
+"""
+import asyncio
+import base64
+import json
+import os
+import tempfile
+import time
+
+HANDLER_SECONDS = 0.2
+CONCURRENCY = [1, 4, 16, 32]
+SESSION_SECRET = "bench-secret"
+
+# app.py reads these and creates users.db in the working directory on import
+os.environ["SESSION_SECRET"] = SESSION_SECRET
+os.environ.setdefault("GROQ_API_KEY", "bench")
+os.chdir(tempfile.mkdtemp())
+
+import httpx
+from itsdangerous import TimestampSigner
+
+import app as backend
+
+
+def session_cookie(user_email):
+    # Same encoding as starlette's SessionMiddleware
+    data = base64.b64encode(json.dumps({"user": user_email}).encode("utf-8"))
+    return TimestampSigner(SESSION_SECRET).sign(data).decode("utf-8")
+
+
+def slow_handler(user_message, function_map, history):
+    time.sleep(HANDLER_SECONDS)
+    return {"reply": f"done: {user_message}"}
+
+
+async def run_inline(fn, *args, **kwargs):
+    return fn(*args, **kwargs)
+
+
+async def fire(concurrency):
+    transport = httpx.ASGITransport(app=backend.app)
+    async with httpx.AsyncClient(
+        transport=transport,
+        base_url="https://testserver",
+        cookies={"inboxai_session": session_cookie("bench@example.com")}
+    ) as client:
+        start = time.perf_counter()
+        responses = await asyncio.gather(*[
+            client.post("/command", json={"command": f"request {i}"})
+            for i in range(concurrency)
+        ])
+        elapsed = time.perf_counter() - start
+
+    ok = sum(1 for r in responses if r.json().get("reply", "").startswith("done"))
+    return elapsed, ok
+
+
+def main():
+    backend.intelligent_command_handler = slow_handler
+    pooled = backend.run_blocking
+
+    print(f"handler blocks {HANDLER_SECONDS * 1000:.0f} ms, pool of {backend.BLOCKING_WORKERS} threads")
+    print(f"{'concurrent':>10} {'inline s':>9} {'pool s':>8} {'inline req/s':>13} {'pool req/s':>11}  ok")
+    for concurrency in CONCURRENCY:
+        backend.run_blocking = run_inline
+        inline_s, inline_ok = asyncio.run(fire(concurrency))
+
+        backend.run_blocking = pooled
+        pool_s, pool_ok = asyncio.run(fire(concurrency))
+
+        print(
+            f"{concurrency:>10} {inline_s:>9.2f} {pool_s:>8.2f} "
+            f"{concurrency / inline_s:>13.1f} {concurrency / pool_s:>11.1f}  "
+            f"{inline_ok == pool_ok == concurrency}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+Compare serial vs batched Gmail message retrieval against the fake server.
+
+Run from backend/:  python -m benchmarks.bench_gmail_batch
+"""
+import os
+import tempfile
+import time
+
+from benchmarks.fake_gmail import FakeGmailService
+from db import init_db
+from services.gmail_client import (
+    attachment_parts,
+    download_attachments,
+    fetch_messages
+)
+
+PAGE_SIZES = [1, 5, 10, 25, 50]
+
+
+def fetch_serial(service, page_size):
+    listed = service.users().messages().list(userId="me", maxResults=page_size).execute()
+    for msg in listed.get("messages", []):
+        msg_data = service.users().messages().get(userId="me", id=msg["id"], format="full").execute()
+        for part in attachment_parts(msg_data["payload"]):
+            service.users().messages().attachments().get(
+                userId="me",
+                messageId=msg["id"],
+                id=part["body"]["attachmentId"]
+            ).execute()
+
+
+def fetch_batched(service, page_size):
+    listed = service.users().messages().list(userId="me", maxResults=page_size).execute()
+    message_ids = [m["id"] for m in listed.get("messages", [])]
+    messages = fetch_messages(service, message_ids)
+    parts = [
+        (m["id"], part)
+        for m in messages
+        for part in attachment_parts(m["payload"])
+    ]
+    downloaded = download_attachments(service, parts)
+
+    # execute_batched logs and drops failed calls; a timing without them is meaningless
+    attachment_count = sum(len(atts) for atts in downloaded.values())
+    if len(messages) != len(message_ids) or attachment_count != len(parts):
+        raise RuntimeError(
+            f"page of {page_size}: fetched {len(messages)}/{len(message_ids)} messages, "
+            f"{attachment_count}/{len(parts)} attachments"
+        )
+
+
+def run(fn, page_size):
+    service = FakeGmailService(page_size)
+    start = time.perf_counter()
+    fn(service, page_size)
+    return time.perf_counter() - start, service.round_trips
+
+
+def main():
+    # The attachment store keeps its index in users.db; use a scratch copy
+    os.chdir(tempfile.mkdtemp())
+    init_db()
+
+    print(f"{'page':>5} {'serial ms':>10} {'trips':>6} {'batched ms':>11} {'trips':>6} {'speedup':>8}")
+    for page_size in PAGE_SIZES:
+        serial_s, serial_trips = run(fetch_serial, page_size)
+        batched_s, batched_trips = run(fetch_batched, page_size)
+        print(
+            f"{page_size:>5} {serial_s * 1000:>10.0f} {serial_trips:>6} "
+            f"{batched_s * 1000:>11.0f} {batched_trips:>6} {serial_s / batched_s:>7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""
+Body extraction on large marketing emails: the old full-decode + regex path
+versus the streaming HTML extractor with an early cutoff. The extractor
+stops at BODY_CHAR_BUDGET, so its cost is flat; the regex path grows with
+the body and is faster only below roughly 100 KB.
+
+Run from backend/:  python -m benchmarks.bench_html_body
+"""
+import base64
+import re
+import time
+
+from ai_logic.email import MAX_BODY_CHARS
+from services.gmail_client import clean_email_text, extract_body
+
+ITERATIONS = 20
+SIZES_KB = [50, 200, 1000]
+
+STYLE = "<style>" + "".join(
+    f".c{i} {{ color: #{i:06x}; font-family: Helvetica, Arial; padding: {i % 20}px; }}\n"
+    for i in range(300)
+) + "</style>"
+
+PROMO = """
+<table width="600" cellpadding="0" cellspacing="0" style="border:0;">
+  <tr><td class="c1" style="padding:12px;font-size:16px;">
+    <a href="https://example.com/track?id={i}&amp;utm_source=newsletter">
+    <img src="https://example.com/p/{i}.png" width="1" height="1" alt=""></a>
+    <h2>Deal #{i}: Save {pct}% on our spring collection</h2>
+    <p>Our new arrivals are here. Pick your favourites before they sell out, free shipping on orders over $50.</p>
+    <p><a href="https://example.com/shop/{i}">Shop now</a> | <a href="https://example.com/view">View in browser</a></p>
+  </td></tr>
+</table>
+"""
+
+
+# Inline markup must read exactly as on the old path
+INLINE_CASES = [
+    "<b>Hello</b> <i>world</i>",
+    "<span>Hi</span> <a>there</a>",
+    "<p>Your order <strong>#123</strong> has <em>shipped</em>.</p>",
+]
+
+# The old path glued table cells together; the new one keeps them apart
+TABLE_CASES = [
+    ("<table><tr><td>Total</td><td>$42</td></tr></table>", "Total $42"),
+    ("<table><tr><th>Item</th><th>Qty</th></tr><tr><td>Lamp</td><td>2</td></tr></table>", "Item Qty\nLamp 2"),
+]
+
+
+def html_payload(html: str) -> dict:
+    data = base64.urlsafe_b64encode(html.encode("utf-8")).decode("ascii")
+    return {"mimeType": "text/html", "body": {"data": data}}
+
+
+def check_markup():
+    """
+    Fail loudly if the streaming extractor drops word or cell boundaries.
+    """
+    for html in INLINE_CASES:
+        payload = html_payload(html)
+        old, new = old_path(payload), new_path(payload)
+        assert new == old, f"{html!r}: new {new!r} != old {old!r}"
+
+    for html, expected in TABLE_CASES:
+        new = extract_body(html_payload(html))
+        assert new == expected, f"{html!r}: got {new!r}, expected {expected!r}"
+
+
+def make_email(size_kb: int) -> dict:
+    html = [
+        "<html><head><title>Spring sale</title>", STYLE, "</head><body>",
+        '<span style="display:none;max-height:0;">Preheader text you never see</span>',
+        "<script>window.dataLayer = [];</script>"
+    ]
+    i = 0
+    while sum(len(p) for p in html) < size_kb * 1024:
+        html.append(PROMO.format(i=i, pct=10 + i % 50))
+        i += 1
+    html.append("<p>Unsubscribe | Privacy policy | Copyright 2024</p></body></html>")
+
+    return html_payload("".join(html))
+
+
+def old_path(payload) -> str:
+    html = base64.urlsafe_b64decode(payload["body"]["data"]).decode("utf-8", errors="ignore")
+    text = clean_email_text(html)
+    return text[:MAX_BODY_CHARS]
+
+
+def new_path(payload) -> str:
+    text = clean_email_text(extract_body(payload))
+    return text[:MAX_BODY_CHARS]
+
+
+def approx_tokens(text: str) -> int:
+    return len(re.findall(r"\w+|[^\w\s]", text))
+
+
+def measure(fn, payload):
+    start = time.process_time()
+    for _ in range(ITERATIONS):
+        out = fn(payload)
+    return (time.process_time() - start) * 1000 / ITERATIONS, approx_tokens(out)
+
+
+def main():
+    check_markup()
+
+    print(f"{'size':>7} {'old cpu ms':>11} {'old tok':>8} {'new cpu ms':>11} {'new tok':>8}")
+    for size_kb in SIZES_KB:
+        payload = make_email(size_kb)
+        old_ms, old_tokens = measure(old_path, payload)
+        new_ms, new_tokens = measure(new_path, payload)
+        print(f"{size_kb:>5}KB {old_ms:>11.2f} {old_tokens:>8} {new_ms:>11.2f} {new_tokens:>8}")
+
+
+if __name__ == "__main__":
+    main()
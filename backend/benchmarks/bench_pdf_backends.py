@@ -0,0 +1,57 @@
+"""
+Compare the PDF text engines on the generated corpus: pdfplumber's layout
+analysis against PDFium's raw text layer, full read and under the
+attachment character budget. A second table shows what table routing
+costs: text only, "auto" (pdfplumber tables just for pages with ruling
+lines) and pdfplumber for every page.
+
+Run from backend/:  python -m benchmarks.bench_pdf_backends
+"""
+import time
+
+from ai_logic.readers.attachment_processor import TEXT_CHAR_BUDGET
+from ai_logic.readers.pdf_reader import extract_text_from_pdf
+from benchmarks.corpus import make_pdf
+
+ITERATIONS = 5
+PAGE_COUNTS = [1, 5, 20, 100]
+
+
+def measure(data, backend, max_pages, max_chars, tables=False):
+    start = time.perf_counter()
+    for _ in range(ITERATIONS):
+        text, _ = extract_text_from_pdf(
+            data, max_pages=max_pages, max_chars=max_chars, tables=tables, backend=backend
+        )
+    return (time.perf_counter() - start) * 1000 / ITERATIONS, text
+
+
+def table_rows_found(text):
+    return sum(1 for line in text.splitlines() if " | " in line)
+
+
+def main():
+    print(f"{'case':<22} {'pdfplumber ms':>14} {'pdfium ms':>10} {'ratio':>6}  same words")
+    for pages in PAGE_COUNTS:
+        data = make_pdf(pages)
+        for label, max_chars in (("all", None), ("budget", TEXT_CHAR_BUDGET)):
+            plumber_ms, plumber_text = measure(data, "pdfplumber", pages, max_chars)
+            pdfium_ms, pdfium_text = measure(data, "pdfium", pages, max_chars)
+            same = plumber_text.split() == pdfium_text.split()
+            name = f"{pages} pages / {label}"
+            print(f"{name:<22} {plumber_ms:>14.1f} {pdfium_ms:>10.1f} {plumber_ms / pdfium_ms:>5.1f}x  {same}")
+
+    print(f"\n{'5 pages':<22} {'text ms':>8} {'auto ms':>8} {'all ms':>8}  table rows (auto / all)")
+    for label, table_rows in (("text only", 0), ("10-row table each", 10)):
+        data = make_pdf(5, table_rows=table_rows)
+        text_ms, _ = measure(data, "pdfium", 5, None)
+        auto_ms, auto_text = measure(data, "pdfium", 5, None, tables="auto")
+        all_ms, all_text = measure(data, "pdfium", 5, None, tables=True)
+        print(
+            f"{label:<22} {text_ms:>8.1f} {auto_ms:>8.1f} {all_ms:>8.1f}  "
+            f"{table_rows_found(auto_text)} / {table_rows_found(all_text)}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,217 @@
+"""
+Reader benchmark suite over a generated attachment corpus.
+
+Every reader runs with its production options (the registry entry used by
+process_attachment) and then process_all_attachments runs on the whole
+corpus. Each case runs in its own subprocess so its peak RSS is measured
+cleanly. Results are written as JSON. Pass a previous run with --compare to
+print the change per case.
+
+Run from backend/:
+    python -m benchmarks.bench_readers
+    python -m benchmarks.bench_readers --compare benchmarks/results/readers-<old>.json
+"""
+import argparse
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import time
+
+from benchmarks.corpus import make_csv, make_docx, make_image, make_pdf, make_xlsx
+
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+ITERATIONS = 10
+
+# name -> (reader kind, filename, corpus factory)
+CASES = {
+    "pdf_1p": ("pdf", "one_page.pdf", lambda: make_pdf(1)),
+    "pdf_20p": ("pdf", "twenty_pages.pdf", lambda: make_pdf(20)),
+    "pdf_200p": ("pdf", "two_hundred_pages.pdf", lambda: make_pdf(200)),
+    "docx_tables": ("docx", "report.docx", lambda: make_docx(200, table_rows=100)),
+    "xlsx_3x5k": ("xlsx", "ledger.xlsx", lambda: make_xlsx(3, 5000)),
+    "csv_100k": ("csv", "export.csv", lambda: make_csv(100_000)),
+    "image_text": ("image", "scan.png", lambda: make_image(text=True)),
+    "image_no_text": ("image", "photo.png", lambda: make_image(text=False)),
+}
+
+END_TO_END = "process_all_attachments"
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    rank = max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered)) - 1))
+    return ordered[rank]
+
+
+def peak_rss_mb():
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def worker_peak_rss_mb():
+    """
+    Peak RSS of each live extraction pool worker. Workers are children of
+    the forkserver rather than of this process, so RUSAGE_CHILDREN does not
+    see them; read VmHWM from /proc instead (Linux only).
+    """
+    from ai_logic.readers import attachment_processor
+
+    pool = attachment_processor._pool
+    peaks = []
+    for pid in [process.pid for process in (getattr(pool, "_pool", None) or [])]:
+        try:
+            with open(f"/proc/{pid}/status") as f:
+                for line in f:
+                    if line.startswith("VmHWM:"):
+                        peaks.append(round(int(line.split()[1]) / 1024, 1))
+        except OSError:
+            pass
+    return peaks
+
+
+def summarize(latencies, total_bytes, files):
+    elapsed = sum(latencies)
+    return {
+        "iterations": len(latencies),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+        "files_per_s": round(files * len(latencies) / elapsed, 2),
+        "mb_per_s": round(total_bytes * len(latencies) / elapsed / (1024 * 1024), 2),
+        "input_bytes": total_bytes,
+    }
+
+
+def run_reader(name, iterations):
+    from ai_logic.readers.attachment_processor import get_reader
+
+    kind, _, factory = CASES[name]
+    data = factory()
+    reader = get_reader(kind)
+
+    # First call pays the lazy import; keep it out of the latencies
+    content, _ = reader(data)
+
+    latencies = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        reader(data)
+        latencies.append(time.perf_counter() - start)
+
+    result = summarize(latencies, len(data), 1)
+    result["error"] = content.startswith("[ERROR")
+    return result
+
+
+def run_end_to_end(iterations):
+    from ai_logic.readers.attachment_processor import MAX_WORKERS, process_all_attachments
+
+    # No sha256, so the extraction cache is bypassed and every run parses
+    attachments = [
+        {"filename": filename, "data": factory()}
+        for _, filename, factory in CASES.values()
+    ]
+    total_bytes = sum(len(a["data"]) for a in attachments)
+
+    # Warm-up starts the pool workers
+    process_all_attachments(attachments)
+
+    latencies = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        process_all_attachments(attachments)
+        latencies.append(time.perf_counter() - start)
+
+    result = summarize(latencies, total_bytes, len(attachments))
+    result["workers"] = MAX_WORKERS
+    result["worker_peak_rss_mb"] = worker_peak_rss_mb()
+    return result
+
+
+def run_case(name, iterations):
+    """
+    Child process entry point: print one case's result as JSON.
+    """
+    if name == END_TO_END:
+        result = run_end_to_end(iterations)
+    else:
+        result = run_reader(name, iterations)
+
+    result["peak_rss_mb"] = round(peak_rss_mb(), 1)
+    print(json.dumps(result))
+
+
+def measure(name, iterations):
+    proc = subprocess.run(
+        [sys.executable, "-m", "benchmarks.bench_readers", "--case", name, "--iterations", str(iterations)],
+        capture_output=True,
+        text=True,
+        cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    )
+    if proc.returncode != 0:
+        return {"failed": proc.stderr.strip().splitlines()[-1:]}
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def print_table(results, baseline=None):
+    print(f"{'case':<24} {'p50 ms':>9} {'p95 ms':>9} {'files/s':>9} {'MB/s':>8} {'RSS MB':>7}  change p50")
+    for name, result in results.items():
+        if "failed" in result:
+            print(f"{name:<24} failed: {result['failed']}")
+            continue
+
+        change = ""
+        previous = (baseline or {}).get(name)
+        if previous and "p50_ms" in previous and previous["p50_ms"]:
+            change = f"{(result['p50_ms'] / previous['p50_ms'] - 1) * 100:+.0f}%"
+
+        note = " (reader error)" if result.get("error") else ""
+        if result.get("worker_peak_rss_mb"):
+            note += f" (workers: {', '.join(map(str, result['worker_peak_rss_mb']))} MB)"
+        print(
+            f"{name:<24} {result['p50_ms']:>9.1f} {result['p95_ms']:>9.1f} "
+            f"{result['files_per_s']:>9.1f} {result['mb_per_s']:>8.1f} {result['peak_rss_mb']:>7.1f}  {change}{note}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--case", help=argparse.SUPPRESS)
+    parser.add_argument("--iterations", type=int, default=ITERATIONS)
+    parser.add_argument("--only", nargs="*", help="run only these cases")
+    parser.add_argument("--output", help="result file (default: benchmarks/results/readers-<time>.json)")
+    parser.add_argument("--compare", help="previous result file to compare against")
+    args = parser.parse_args()
+
+    if args.case:
+        run_case(args.case, args.iterations)
+        return
+
+    names = args.only or list(CASES) + [END_TO_END]
+    results = {name: measure(name, args.iterations) for name in names}
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)["results"]
+
+    print_table(results, baseline)
+
+    output = args.output or os.path.join(RESULTS_DIR, time.strftime("readers-%Y%m%d-%H%M%S.json"))
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump({
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "iterations": args.iterations,
+            "results": results,
+        }, f, indent=2)
+    print(f"\nSaved {output}")
+
+
+if __name__ == "__main__":
+    main()
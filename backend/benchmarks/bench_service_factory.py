@@ -0,0 +1,53 @@
+"""
+Per-request cost of building Gmail/Calendar service objects, before and
+after the cached service factory. Runs offline (bundled discovery docs).
+
+Run from backend/:  python -m benchmarks.bench_service_factory
+"""
+import time
+
+from google.auth.credentials import AnonymousCredentials
+from googleapiclient.discovery import build
+
+from services.google_services import get_service
+
+ITERATIONS = 50
+
+# A typical /command builds Gmail two or three times and Calendar once
+PER_REQUEST = [("gmail", "v1"), ("gmail", "v1"), ("gmail", "v1"), ("calendar", "v3")]
+
+
+def per_request_ms(fn):
+    start = time.perf_counter()
+    for _ in range(ITERATIONS):
+        fn()
+    return (time.perf_counter() - start) * 1000 / ITERATIONS
+
+
+def main():
+    creds = AnonymousCredentials()
+
+    def uncached():
+        for name, version in PER_REQUEST:
+            build(name, version, credentials=creds)
+
+    def cached():
+        for name, version in PER_REQUEST:
+            get_service(name, version, creds)
+
+    # First call pays the one-off document parse, as the first request would
+    start = time.perf_counter()
+    cached()
+    warmup_ms = (time.perf_counter() - start) * 1000
+
+    before = per_request_ms(uncached)
+    after = per_request_ms(cached)
+
+    print(f"discovery.build per request:  {before:8.2f} ms")
+    print(f"cached factory per request:   {after:8.2f} ms")
+    print(f"one-off warmup:               {warmup_ms:8.2f} ms")
+    print(f"removed per request:          {before - after:8.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+"""
+Regression check for single-pass extraction: the old processor ran each
+extractor twice (content, then again for the truncated flag) and read every
+page; the budgeted readers run once and stop at the character budget.
+
+Run from backend/:  python -m benchmarks.bench_single_pass
+"""
+import time
+
+from ai_logic.readers.attachment_processor import TEXT_CHAR_BUDGET
+from ai_logic.readers.pdf_reader import extract_text_from_pdf
+from ai_logic.readers.word_reader import extract_text_from_docx
+from benchmarks.corpus import make_docx, make_pdf
+
+ITERATIONS = 5
+
+
+def old_style(extract, data):
+    content, _ = extract(data)
+    content = content[:TEXT_CHAR_BUDGET]
+    truncated = len(extract(data)[0]) > TEXT_CHAR_BUDGET
+    return content, truncated
+
+
+def new_style(extract, data):
+    return extract(data, max_chars=TEXT_CHAR_BUDGET)
+
+
+def measure(fn, extract, data):
+    start = time.perf_counter()
+    for _ in range(ITERATIONS):
+        result = fn(extract, data)
+    return (time.perf_counter() - start) * 1000 / ITERATIONS, result
+
+
+def main():
+    cases = [
+        ("pdf 5 pages", extract_text_from_pdf, make_pdf(5)),
+        ("pdf 20 pages", extract_text_from_pdf, make_pdf(20)),
+        ("docx 200 paras", extract_text_from_docx, make_docx(200, table_rows=50)),
+    ]
+
+    print(f"{'case':<16} {'old ms':>9} {'new ms':>9} {'ratio':>6}  same output")
+    for name, extract, data in cases:
+        old_ms, old_result = measure(old_style, extract, data)
+        new_ms, new_result = measure(new_style, extract, data)
+        print(f"{name:<16} {old_ms:>9.1f} {new_ms:>9.1f} {old_ms / new_ms:>5.1f}x  {old_result == new_result}")
+
+
+if __name__ == "__main__":
+    main()
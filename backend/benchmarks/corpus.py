@@ -0,0 +1,162 @@
+"""
+Reproducible attachment corpus for the reader benchmarks, generated offline.
+"""
+import io
+import random
+
+WORDS = (
+    "invoice payment total amount due quarterly report revenue customer order "
+    "shipping delivery contract agreement meeting schedule project budget team "
+    "review approval summary account balance statement period service"
+).split()
+
+
+def sentence(rng, words=12):
+    return " ".join(rng.choice(WORDS) for _ in range(words)).capitalize() + "."
+
+
+def _pdf_escape(text):
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def _pdf_table(rng, rows, cols=3, top=300, row_height=18, col_width=150, left=50):
+    """
+    Content stream for a ruled table: cell text plus the grid lines that
+    pdfplumber's table finder (and the reader's table check) look for.
+    """
+    ops = ["0.5 w"]
+    bottom = top - rows * row_height
+    for r in range(rows + 1):
+        y = top - r * row_height
+        ops.append(f"{left} {y} m {left + cols * col_width} {y} l S")
+    for c in range(cols + 1):
+        x = left + c * col_width
+        ops.append(f"{x} {top} m {x} {bottom} l S")
+
+    for r in range(rows):
+        for c in range(cols):
+            cell = f"{rng.choice(WORDS)} {rng.randint(1, 999)}"
+            x, y = left + c * col_width + 4, top - (r + 1) * row_height + 5
+            ops.append(f"BT /F1 9 Tf {x} {y} Td ({cell}) Tj ET")
+
+    return "\n".join(ops)
+
+
+def make_pdf(pages: int, lines_per_page: int = 40, seed: int = 0, table_rows: int = 0) -> bytes:
+    """
+    Minimal text-layer PDF (Helvetica, one content stream per page); with
+    table_rows, each page ends with a ruled table instead of its last lines.
+    """
+    rng = random.Random(seed)
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        None,  # page tree, filled in below
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    kids = []
+
+    for _ in range(pages):
+        body_lines = min(lines_per_page, 30) if table_rows else lines_per_page
+        lines = [f"({_pdf_escape(sentence(rng))}) '" for _ in range(body_lines)]
+        stream = "BT /F1 10 Tf 50 760 Td 14 TL\n" + "\n".join(lines) + "\nET"
+        if table_rows:
+            stream += "\n" + _pdf_table(rng, table_rows)
+        stream = stream.encode("latin-1")
+
+        objects.append(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+        content_ref = len(objects)
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % content_ref
+        )
+        kids.append(len(objects))
+
+    objects[1] = (
+        b"<< /Type /Pages /Kids [" + b" ".join(b"%d 0 R" % k for k in kids)
+        + b"] /Count %d >>" % len(kids)
+    )
+
+    out = io.BytesIO()
+    out.write(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(out.tell())
+        out.write(b"%d 0 obj\n" % number + body + b"\nendobj\n")
+
+    xref = out.tell()
+    out.write(b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1))
+    for offset in offsets:
+        out.write(b"%010d 00000 n \n" % offset)
+    out.write(b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref))
+
+    return out.getvalue()
+
+
+def make_docx(paragraphs: int, table_rows: int = 0, seed: int = 0) -> bytes:
+    from docx import Document
+
+    rng = random.Random(seed)
+    doc = Document()
+    for _ in range(paragraphs):
+        doc.add_paragraph(" ".join(sentence(rng) for _ in range(3)))
+
+    if table_rows:
+        table = doc.add_table(rows=table_rows, cols=4)
+        for row in table.rows:
+            for cell in row.cells:
+                cell.text = rng.choice(WORDS)
+
+    out = io.BytesIO()
+    doc.save(out)
+    return out.getvalue()
+
+
+def make_xlsx(sheets: int, rows: int, cols: int = 6, seed: int = 0) -> bytes:
+    from openpyxl import Workbook
+
+    rng = random.Random(seed)
+    wb = Workbook(write_only=True)
+    for sheet_idx in range(sheets):
+        sheet = wb.create_sheet(f"Sheet{sheet_idx + 1}")
+        sheet.append(["id", "customer", "status"] + [f"amount_{c}" for c in range(cols - 3)])
+        for row in range(rows):
+            sheet.append(
+                [row, rng.choice(WORDS), rng.choice(["open", "paid", "late"])]
+                + [round(rng.uniform(0, 10000), 2) for _ in range(cols - 3)]
+            )
+
+    out = io.BytesIO()
+    wb.save(out)
+    return out.getvalue()
+
+
+def make_csv(rows: int, cols: int = 8, seed: int = 0) -> bytes:
+    rng = random.Random(seed)
+    lines = [",".join(["id", "date", "customer"] + [f"value_{c}" for c in range(cols - 3)])]
+    for row in range(rows):
+        lines.append(",".join(
+            [str(row), f"2024-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}", rng.choice(WORDS)]
+            + [f"{rng.uniform(0, 1000):.2f}" for _ in range(cols - 3)]
+        ))
+    return ("\n".join(lines) + "\n").encode("utf-8")
+
+
+def make_image(text: bool, width: int = 1200, height: int = 800, seed: int = 0) -> bytes:
+    """
+    PNG with lines of black-on-white text (text=True), or a smooth
+    photo-like gradient with no text.
+    """
+    from PIL import Image, ImageDraw
+
+    rng = random.Random(seed)
+    if text:
+        image = Image.new("RGB", (width, height), "white")
+        draw = ImageDraw.Draw(image)
+        for y in range(20, height - 20, 24):
+            draw.text((20, y), sentence(rng, 14), fill="black")
+    else:
+        image = Image.linear_gradient("L").resize((width, height)).convert("RGB")
+
+    out = io.BytesIO()
+    image.save(out, "PNG")
+    return out.getvalue()
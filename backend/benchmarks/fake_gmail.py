@@ -0,0 +1,121 @@
+"""
+In-process stand-in for the Gmail API used by the benchmarks.
+
+Every HTTP round trip sleeps for ROUND_TRIP_SECONDS, so a batch of N calls
+costs one round trip while N individual calls cost N.
+"""
+import base64
+import time
+
+ROUND_TRIP_SECONDS = 0.08
+
+
+def _b64(text: str) -> str:
+    return base64.urlsafe_b64encode(text.encode("utf-8")).decode("ascii")
+
+
+def make_message(idx: int, attachments: int = 1) -> dict:
+    parts = [{
+        "mimeType": "text/plain",
+        "body": {"data": _b64(f"Hello, this is message {idx}. " * 20)}
+    }]
+    for a in range(attachments):
+        parts.append({
+            "filename": f"file_{idx}_{a}.txt",
+            "mimeType": "text/plain",
+            "body": {"attachmentId": f"att-{idx}-{a}", "size": 64}
+        })
+
+    return {
+        "id": f"msg-{idx}",
+        "threadId": f"thread-{idx}",
+        "labelIds": ["INBOX", "UNREAD"],
+        "snippet": f"Hello, this is message {idx}.",
+        "payload": {
+            "headers": [
+                {"name": "From", "value": f"Sender {idx} <sender{idx}@example.com>"},
+                {"name": "Subject", "value": f"Subject {idx}"}
+            ],
+            "parts": parts
+        }
+    }
+
+
+class FakeRequest:
+    def __init__(self, server, handler):
+        self.server = server
+        self.handler = handler
+
+    def execute(self, num_retries=0):
+        self.server.round_trip()
+        return self.handler()
+
+
+class FakeBatch:
+    def __init__(self, server, callback):
+        self.server = server
+        self.callback = callback
+        self.requests = []
+
+    def add(self, request, request_id=None):
+        self.requests.append((request_id, request))
+
+    def execute(self):
+        self.server.round_trip()
+        for request_id, request in self.requests:
+            self.callback(request_id, request.handler(), None)
+
+
+class FakeAttachments:
+    def __init__(self, server):
+        self.server = server
+
+    def get(self, userId, messageId, id):
+        return FakeRequest(self.server, lambda: {"data": _b64(f"attachment {id}"), "size": 64})
+
+
+class FakeMessages:
+    def __init__(self, server):
+        self.server = server
+
+    def list(self, userId, q=None, maxResults=100, pageToken=None, fields=None):
+        ids = [{"id": m["id"], "threadId": m["threadId"]} for m in self.server.messages[:maxResults]]
+        return FakeRequest(self.server, lambda: {
+            "messages": ids,
+            "resultSizeEstimate": len(self.server.messages)
+        })
+
+    def get(self, userId, id, format="full", metadataHeaders=None, fields=None):
+        return FakeRequest(self.server, lambda: self.server.by_id[id])
+
+    def attachments(self):
+        return FakeAttachments(self.server)
+
+
+class FakeUsers:
+    def __init__(self, server):
+        self.server = server
+
+    def messages(self):
+        return FakeMessages(self.server)
+
+
+class FakeGmailService:
+    """
+    Mimics the subset of the googleapiclient Gmail resource the client uses.
+    """
+
+    def __init__(self, message_count: int, attachments_per_message: int = 1):
+        self.messages = [make_message(i, attachments_per_message) for i in range(message_count)]
+        self.by_id = {m["id"]: m for m in self.messages}
+        self.round_trips = 0
+
+    def round_trip(self):
+        self.round_trips += 1
+        time.sleep(ROUND_TRIP_SECONDS)
+
+    def users(self):
+        return FakeUsers(self)
+
+    def new_batch_http_request(self, callback=None):
+        return FakeBatch(self, callback)
@@ -1,4 +1,7 @@
+import json
 import sqlite3
+import threading
+import time
 
 def get_db():
     return sqlite3.connect("users.db")
@@ -30,6 +33,93 @@ def init_db():
             FOREIGN KEY (email) REFERENCES users (email)
         )
     """)
+
+    # Per-message summary cache (keyed by user, Gmail message id and content hash)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS summary_cache (
+            email TEXT NOT NULL,
+            message_id TEXT NOT NULL,
+            content_hash TEXT NOT NULL,
+            summary TEXT NOT NULL,
+            created_at REAL NOT NULL,
+            last_used_at REAL NOT NULL,
+            PRIMARY KEY (email, message_id, content_hash)
+        )
+    """)
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_summary_cache_last_used
+        ON summary_cache (last_used_at)
+    """)
+
+    # Gmail sync state (last historyId seen per user)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS sync_state (
+            email TEXT PRIMARY KEY,
+            history_id TEXT NOT NULL,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (email) REFERENCES users (email)
+        )
+    """)
+
+    # Content-addressed attachment store: one row per distinct file (sha256)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS attachment_blobs (
+            sha256 TEXT PRIMARY KEY,
+            size INTEGER NOT NULL,
+            created_at REAL NOT NULL,
+            last_used_at REAL NOT NULL
+        )
+    """)
+
+    # Which user/message/filename points at which blob
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS attachment_refs (
+            email TEXT NOT NULL,
+            message_id TEXT NOT NULL,
+            filename TEXT NOT NULL,
+            size INTEGER NOT NULL,
+            sha256 TEXT NOT NULL,
+            last_used_at REAL NOT NULL,
+            PRIMARY KEY (email, message_id, filename)
+        )
+    """)
+
+    # Extraction results keyed by sha256 + file extension
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS attachment_extractions (
+            cache_key TEXT PRIMARY KEY,
+            result TEXT NOT NULL,
+            created_at REAL NOT NULL
+        )
+    """)
+
+    # LLM responses keyed by a hash of the full request (optional tier)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS llm_cache (
+            cache_key TEXT PRIMARY KEY,
+            response TEXT NOT NULL,
+            created_at REAL NOT NULL
+        )
+    """)
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_llm_cache_created
+        ON llm_cache (created_at)
+    """)
+
+    # Local mirror of unread message metadata
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS unread_messages (
+            email TEXT NOT NULL,
+            message_id TEXT NOT NULL,
+            thread_id TEXT,
+            sender TEXT,
+            subject TEXT,
+            snippet TEXT,
+            internal_date INTEGER,
+            PRIMARY KEY (email, message_id),
+            FOREIGN KEY (email) REFERENCES users (email)
+        )
+    """)
     
     conn.commit()
     conn.close()
@@ -66,6 +156,7 @@ def save_conversation(email: str, role: str, content: str):
     conn.close()
 
 def get_conversation_history(user_email: str, limit: int = 10):
+    """The most recent `limit` messages, oldest first"""
     conn = sqlite3.connect("users.db")
     cursor = conn.cursor()
 
@@ -73,11 +164,11 @@ def get_conversation_history(user_email: str, limit: int = 10):
         SELECT role, content
         FROM conversations
         WHERE email = ?
-        ORDER BY id ASC
+        ORDER BY id DESC
         LIMIT ?
     """, (user_email, limit))
 
-    rows = cursor.fetchall()
+    rows = cursor.fetchall()[::-1]
     conn.close()
 
     return [
@@ -87,3 +178,366 @@ def get_conversation_history(user_email: str, limit: int = 10):
         }
         for role, content in rows
     ]
+
+
+# ===================== SYNC STATE =====================
+def get_history_id(email: str):
+    conn = sqlite3.connect("users.db")
+    row = conn.execute(
+        "SELECT history_id FROM sync_state WHERE email = ?",
+        (email,)
+    ).fetchone()
+    conn.close()
+    return row[0] if row else None
+
+
+def save_unread_sync(email: str, history_id: str, upserts=None, removed_ids=None, replace: bool = False):
+    """
+    Apply one sync step to the unread mirror and record the new historyId
+    in a single transaction. With replace=True the mirror is rebuilt from upserts.
+    """
+    conn = sqlite3.connect("users.db")
+    cursor = conn.cursor()
+
+    if replace:
+        cursor.execute("DELETE FROM unread_messages WHERE email = ?", (email,))
+
+    if removed_ids:
+        cursor.executemany(
+            "DELETE FROM unread_messages WHERE email = ? AND message_id = ?",
+            [(email, message_id) for message_id in removed_ids]
+        )
+
+    if upserts:
+        cursor.executemany("""
+            INSERT OR REPLACE INTO unread_messages
+                (email, message_id, thread_id, sender, subject, snippet, internal_date)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        """, [
+            (
+                email,
+                m["id"],
+                m.get("thread_id"),
+                m.get("from"),
+                m.get("subject"),
+                m.get("snippet"),
+                m.get("internal_date")
+            )
+            for m in upserts
+        ])
+
+    cursor.execute("""
+        INSERT OR REPLACE INTO sync_state (email, history_id, updated_at)
+        VALUES (?, ?, CURRENT_TIMESTAMP)
+    """, (email, str(history_id)))
+
+    conn.commit()
+    conn.close()
+
+
+def get_unread_mirror(email: str, limit: int = 50):
+    """Unread message metadata from the local mirror, newest first"""
+    conn = sqlite3.connect("users.db")
+    rows = conn.execute("""
+        SELECT message_id, thread_id, sender, subject, snippet, internal_date
+        FROM unread_messages
+        WHERE email = ?
+        ORDER BY internal_date DESC
+        LIMIT ?
+    """, (email, limit)).fetchall()
+    conn.close()
+
+    return [
+        {
+            "id": message_id,
+            "thread_id": thread_id,
+            "from": sender,
+            "subject": subject,
+            "snippet": snippet,
+            "internal_date": internal_date
+        }
+        for message_id, thread_id, sender, subject, snippet, internal_date in rows
+    ]
+
+
+def count_unread_mirror(email: str) -> int:
+    """Number of messages in the local unread mirror"""
+    conn = sqlite3.connect("users.db")
+    count = conn.execute(
+        "SELECT COUNT(*) FROM unread_messages WHERE email = ?",
+        (email,)
+    ).fetchone()[0]
+    conn.close()
+    return count
+
+
+# ===================== ATTACHMENT STORE =====================
+def get_attachment_ref(email: str, message_id: str, filename: str, size: int):
+    """sha256 of a previously stored attachment, refreshing its LRU timestamps"""
+    conn = sqlite3.connect("users.db")
+    cursor = conn.cursor()
+
+    row = cursor.execute("""
+        SELECT sha256 FROM attachment_refs
+        WHERE email = ? AND message_id = ? AND filename = ? AND size = ?
+    """, (email, message_id, filename, size)).fetchone()
+
+    if row:
+        now = time.time()
+        cursor.execute("""
+            UPDATE attachment_refs SET last_used_at = ?
+            WHERE email = ? AND message_id = ? AND filename = ?
+        """, (now, email, message_id, filename))
+        cursor.execute(
+            "UPDATE attachment_blobs SET last_used_at = ? WHERE sha256 = ?",
+            (now, row[0])
+        )
+        conn.commit()
+
+    conn.close()
+    return row[0] if row else None
+
+
+def save_attachment_ref(email: str, message_id: str, filename: str, size: int, sha256: str):
+    conn = sqlite3.connect("users.db")
+    cursor = conn.cursor()
+
+    now = time.time()
+    cursor.execute("""
+        INSERT OR IGNORE INTO attachment_blobs (sha256, size, created_at, last_used_at)
+        VALUES (?, ?, ?, ?)
+    """, (sha256, size, now, now))
+    cursor.execute(
+        "UPDATE attachment_blobs SET last_used_at = ? WHERE sha256 = ?",
+        (now, sha256)
+    )
+    cursor.execute("""
+        INSERT OR REPLACE INTO attachment_refs
+            (email, message_id, filename, size, sha256, last_used_at)
+        VALUES (?, ?, ?, ?, ?, ?)
+    """, (email, message_id, filename, size, sha256, now))
+
+    conn.commit()
+    conn.close()
+
+
+def evict_attachment_blobs(email: str, user_quota: int, max_total: int, max_age: float):
+    """
+    Enforce the per-user quota, the maximum blob age and the total store size,
+    least recently used first. Returns the sha256 of blobs no longer referenced,
+    whose files the caller should delete.
+    """
+    conn = sqlite3.connect("users.db")
+    cursor = conn.cursor()
+
+    # Per-user quota over the distinct blobs this user references
+    rows = cursor.execute("""
+        SELECT r.message_id, r.filename, r.sha256, b.size
+        FROM attachment_refs r JOIN attachment_blobs b ON b.sha256 = r.sha256
+        WHERE r.email = ?
+        ORDER BY r.last_used_at DESC
+    """, (email,)).fetchall()
+
+    used = 0
+    counted = set()
+    for message_id, filename, sha256, size in rows:
+        if sha256 not in counted:
+            counted.add(sha256)
+            used += size
+        if used > user_quota:
+            cursor.execute(
+                "DELETE FROM attachment_refs WHERE email = ? AND message_id = ? AND filename = ?",
+                (email, message_id, filename)
+            )
+
+    # Age and total size limits across all users
+    now = time.time()
+    expired = [
+        row[0] for row in cursor.execute(
+            "SELECT sha256 FROM attachment_blobs WHERE last_used_at <= ?",
+            (now - max_age,)
+        )
+    ]
+
+    total = 0
+    for sha256, size in cursor.execute(
+        "SELECT sha256, size FROM attachment_blobs WHERE last_used_at > ? ORDER BY last_used_at DESC",
+        (now - max_age,)
+    ).fetchall():
+        total += size
+        if total > max_total:
+            expired.append(sha256)
+
+    cursor.executemany(
+        "DELETE FROM attachment_refs WHERE sha256 = ?",
+        [(sha256,) for sha256 in expired]
+    )
+
+    orphans = [
+        row[0] for row in cursor.execute("""
+            SELECT sha256 FROM attachment_blobs
+            WHERE sha256 NOT IN (SELECT sha256 FROM attachment_refs)
+        """)
+    ]
+    cursor.executemany(
+        "DELETE FROM attachment_blobs WHERE sha256 = ?",
+        [(sha256,) for sha256 in orphans]
+    )
+    cursor.execute(
+        "DELETE FROM attachment_extractions WHERE created_at <= ?",
+        (now - max_age,)
+    )
+
+    conn.commit()
+    conn.close()
+    return orphans
+
+
+def get_attachment_extraction(cache_key: str):
+    conn = sqlite3.connect("users.db")
+    row = conn.execute(
+        "SELECT result FROM attachment_extractions WHERE cache_key = ?",
+        (cache_key,)
+    ).fetchone()
+    conn.close()
+    return json.loads(row[0]) if row else None
+
+
+def save_attachment_extraction(cache_key: str, result: dict):
+    conn = sqlite3.connect("users.db")
+    conn.execute("""
+        INSERT OR REPLACE INTO attachment_extractions (cache_key, result, created_at)
+        VALUES (?, ?, ?)
+    """, (cache_key, json.dumps(result), time.time()))
+    conn.commit()
+    conn.close()
+
+# ===================== SUMMARY CACHE =====================
+SUMMARY_CACHE_TTL_SECONDS = 7 * 24 * 60 * 60
+SUMMARY_CACHE_MAX_ENTRIES = 5000
+
+_summary_cache_stats = {"hits": 0, "misses": 0}
+_summary_cache_stats_lock = threading.Lock()
+
+
+def _count_summary_cache(result: str):
+    with _summary_cache_stats_lock:
+        _summary_cache_stats[result] += 1
+
+
+def get_cached_summary(email: str, message_id: str, content_hash: str):
+    """Return a cached summary, or None if missing or older than the TTL"""
+    conn = sqlite3.connect("users.db")
+    cursor = conn.cursor()
+
+    now = time.time()
+    cursor.execute("""
+        SELECT summary
+        FROM summary_cache
+        WHERE email = ? AND message_id = ? AND content_hash = ? AND created_at > ?
+    """, (email, message_id, content_hash, now - SUMMARY_CACHE_TTL_SECONDS))
+
+    row = cursor.fetchone()
+    if row:
+        cursor.execute("""
+            UPDATE summary_cache
+            SET last_used_at = ?
+            WHERE email = ? AND message_id = ? AND content_hash = ?
+        """, (now, email, message_id, content_hash))
+        conn.commit()
+
+    conn.close()
+
+    _count_summary_cache("hits" if row else "misses")
+    return row[0] if row else None
+
+
+def save_cached_summary(email: str, message_id: str, content_hash: str, summary: str):
+    """Store a summary, then evict expired and least recently used entries"""
+    conn = sqlite3.connect("users.db")
+    cursor = conn.cursor()
+
+    now = time.time()
+    cursor.execute("""
+        INSERT OR REPLACE INTO summary_cache
+            (email, message_id, content_hash, summary, created_at, last_used_at)
+        VALUES (?, ?, ?, ?, ?, ?)
+    """, (email, message_id, content_hash, summary, now, now))
+
+    cursor.execute(
+        "DELETE FROM summary_cache WHERE created_at <= ?",
+        (now - SUMMARY_CACHE_TTL_SECONDS,)
+    )
+    cursor.execute("""
+        DELETE FROM summary_cache
+        WHERE rowid IN (
+            SELECT rowid FROM summary_cache
+            ORDER BY last_used_at DESC
+            LIMIT -1 OFFSET ?
+        )
+    """, (SUMMARY_CACHE_MAX_ENTRIES,))
+
+    conn.commit()
+    conn.close()
+
+
+def get_summary_cache_stats():
+    """Hit/miss counters for this process plus the current cache size"""
+    conn = sqlite3.connect("users.db")
+    entries = conn.execute("SELECT COUNT(*) FROM summary_cache").fetchone()[0]
+    conn.close()
+
+    with _summary_cache_stats_lock:
+        hits = _summary_cache_stats["hits"]
+        misses = _summary_cache_stats["misses"]
+
+    lookups = hits + misses
+    return {
+        "hits": hits,
+        "misses": misses,
+        "hit_ratio": round(hits / lookups, 3) if lookups else 0.0,
+        "entries": entries
+    }
+
+# ===================== LLM CACHE =====================
+def get_llm_cache(cache_key: str, max_age: float):
+    """Cached LLM response, or None if missing or older than max_age seconds"""
+    conn = sqlite3.connect("users.db")
+    row = conn.execute(
+        "SELECT response FROM llm_cache WHERE cache_key = ? AND created_at > ?",
+        (cache_key, time.time() - max_age)
+    ).fetchone()
+    conn.close()
+    return row[0] if row else None
+
+
+def save_llm_cache(cache_key: str, response: str, max_age: float, max_entries: int):
+    """Store a response, then drop expired entries and the oldest beyond max_entries"""
+    conn = sqlite3.connect("users.db")
+    cursor = conn.cursor()
+
+    now = time.time()
+    cursor.execute("""
+        INSERT OR REPLACE INTO llm_cache (cache_key, response, created_at)
+        VALUES (?, ?, ?)
+    """, (cache_key, response, now))
+
+    cursor.execute("DELETE FROM llm_cache WHERE created_at <= ?", (now - max_age,))
+    cursor.execute("""
+        DELETE FROM llm_cache
+        WHERE rowid IN (
+            SELECT rowid FROM llm_cache
+            ORDER BY created_at DESC
+            LIMIT -1 OFFSET ?
+        )
+    """, (max_entries,))
+
+    conn.commit()
+    conn.close()
+
+
+def count_llm_cache():
+    conn = sqlite3.connect("users.db")
+    entries = conn.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0]
+    conn.close()
+    return entries
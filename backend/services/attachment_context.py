@@ -0,0 +1,109 @@
+# services/attachment_context.py
+import threading
+import time
+from collections import OrderedDict
+
+from ai_logic.readers.attachment_processor import (
+    process_all_attachments,
+    create_attachment_summary
+)
+from services.gmail_client import (
+    get_gmail_service,
+    get_header,
+    attachments_complete,
+    extract_attachments
+)
+from services.progress import report_progress
+
+# Extracted attachment text is reused for follow-up questions within this window
+ATTACHMENT_CONTEXT_TTL_SECONDS = 30 * 60
+MAX_CACHED_CONTEXTS = 256
+
+_contexts = OrderedDict()
+_lock = threading.Lock()
+
+
+def _cached(key):
+    with _lock:
+        entry = _contexts.get(key)
+        if not entry:
+            return None
+
+        stored_at, context = entry
+        if time.time() - stored_at > ATTACHMENT_CONTEXT_TTL_SECONDS:
+            del _contexts[key]
+            return None
+
+        _contexts.move_to_end(key)
+        return context
+
+
+def _store(key, context):
+    with _lock:
+        _contexts[key] = (time.time(), context)
+        _contexts.move_to_end(key)
+        while len(_contexts) > MAX_CACHED_CONTEXTS:
+            _contexts.popitem(last=False)
+
+
+def latest_attachment_message_id(service):
+    results = service.users().messages().list(
+        userId="me",
+        q="is:unread has:attachment",
+        maxResults=1,
+        fields="messages/id"
+    ).execute()
+
+    messages = results.get("messages", [])
+    return messages[0]["id"] if messages else None
+
+
+def get_attachment_context(creds, user_email: str, message_id: str = None):
+    """
+    Extracted attachment text for one email (the latest unread email with
+    attachments by default), or None if there is no such email.
+
+    Results are cached per (user, message), so follow-up questions about the
+    same document skip the Gmail download and the extraction. Contexts with
+    an attachment that was skipped, failed or not downloaded are not cached,
+    since those failures are usually temporary.
+    """
+    service = get_gmail_service(creds)
+
+    if message_id is None:
+        report_progress("Looking for your latest email with attachments")
+        message_id = latest_attachment_message_id(service)
+        if message_id is None:
+            return None
+
+    key = (user_email, message_id)
+    context = _cached(key)
+    if context is not None:
+        return context
+
+    msg_data = service.users().messages().get(
+        userId="me",
+        id=message_id,
+        format="full"
+    ).execute()
+
+    payload = msg_data.get("payload", {})
+    headers = payload.get("headers", [])
+
+    report_progress(f"Downloading attachments from \"{get_header(headers, 'subject', 'No Subject')}\"")
+    attachments = []
+    extract_attachments(payload, service, message_id, attachments, user_email=user_email)
+    processed = process_all_attachments(attachments)
+
+    context = {
+        "message_id": message_id,
+        "from": get_header(headers, "from", "Unknown"),
+        "subject": get_header(headers, "subject", "No Subject"),
+        "filenames": [att["filename"] for att in processed],
+        "text": create_attachment_summary(processed)
+    }
+
+    if attachments_complete(payload, processed):
+        _store(key, context)
+
+    return context
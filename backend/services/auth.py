@@ -5,6 +5,7 @@ from google_auth_oauthlib.flow import Flow
 import requests
 import os
 from db import save_user
+from services.token_manager import token_manager
 
 auth_router = APIRouter(prefix="/auth", tags=["auth"])
 
@@ -78,6 +79,7 @@ async def google_callback(request: Request, code: str = None, state: str = None,
     # Save refresh token
     if credentials.refresh_token:
         save_user(email, credentials.refresh_token)
+        token_manager.invalidate(email)
     
     # Store user in session
     request.session["user"] = email
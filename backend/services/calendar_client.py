@@ -1,10 +1,11 @@
 # services/calendar_client.py
-from googleapiclient.discovery import build
 from google.oauth2.credentials import Credentials
 from datetime import datetime, timedelta
 import os
 from typing import List
 
+from services.google_services import get_service
+
 def create_meeting(
     creds: Credentials,
     title: str = "Meeting via InboxAI",
@@ -21,7 +22,7 @@ def create_meeting(
     """
     try:
         # Build Calendar service
-        calendar_service = build('calendar', 'v3', credentials=creds)
+        calendar_service = get_service('calendar', 'v3', creds)
         
         # Parse date and time
         if date and time:
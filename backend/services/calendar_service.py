@@ -1,14 +1,15 @@
-from googleapiclient.discovery import build
 from datetime import datetime, timedelta
 import uuid
 
+from services.google_services import get_service
+
 
 def create_google_meeting(creds, meeting_data):
     """
     Creates a Google Calendar event with a Google Meet link
     """
 
-    service = build("calendar", "v3", credentials=creds)
+    service = get_service("calendar", "v3", creds)
 
     # Parse start & end time
     start_dt = datetime.fromisoformat(meeting_data["start"])
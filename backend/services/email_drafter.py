@@ -23,7 +23,8 @@ Tone: {tone}
 Context: {context}
 """
 
-    response = call_llm(prompt)
+    # Asking again should give fresh drafts, not the cached ones
+    response = call_llm(prompt, cache=False)
 
     # 🧠 IMPORTANT: parse LLM output safely
     try:
@@ -1,125 +1,309 @@
-import os
 import base64
+import hashlib
+import html
 import re
+import time
 from email.message import EmailMessage
 
-from googleapiclient.discovery import build
-from google.oauth2.credentials import Credentials
-from google.auth.transport.requests import Request as GoogleRequest
+from googleapiclient.errors import HttpError
 
-from ai_logic.email import summarize_email_logic
+from ai_logic.email import summarize_email_logic, summarize_emails_batch, fallback_summary
 from ai_logic.readers.attachment_processor import (
     process_all_attachments,
     create_attachment_summary
 )
+from ai_logic.readers.attachment_store import lookup_attachment, store_attachment
+from ai_logic.readers.guards import size_limit_reason
+from db import (
+    get_cached_summary,
+    save_cached_summary,
+    get_history_id,
+    save_unread_sync,
+    get_unread_mirror,
+    count_unread_mirror
+)
+from services.google_services import get_service
+from services.progress import report_progress
+from services.html_text import html_to_text, iter_base64_text, decode_text_prefix
+from services.token_manager import get_credentials_for_user  # re-exported for app.py
 
-# ============================ CREDENTIALS ============================
-
-def get_credentials_for_user(email: str):
-    """
-    Get Google credentials for a specific user using their refresh token from DB.
-    """
-    from db import get_refresh_token  # avoid circular import
+# ============================ GMAIL SERVICE ============================
 
-    refresh_token = get_refresh_token(email)
-    if not refresh_token:
-        raise Exception(f"No credentials found for user: {email}")
+def get_gmail_service(creds):
+    return get_service("gmail", "v1", creds)
 
-    client_id = os.environ.get("GOOGLE_CLIENT_ID")
-    client_secret = os.environ.get("GOOGLE_CLIENT_SECRET")
+# ============================ BODY EXTRACTION ============================
 
-    if not client_id or not client_secret:
-        raise Exception("Google OAuth credentials not configured")
+# Visible body characters kept per message; summarize_email_logic uses 2000
+# after clean_email_text drops boilerplate sentences, so keep some headroom
+BODY_CHAR_BUDGET = 4000
 
-    creds = Credentials(
-        token=None,
-        refresh_token=refresh_token,
-        token_uri="https://oauth2.googleapis.com/token",
-        client_id=client_id,
-        client_secret=client_secret,
-        scopes=[
-            "https://www.googleapis.com/auth/gmail.modify",
-            "https://www.googleapis.com/auth/calendar",
-            "https://www.googleapis.com/auth/userinfo.email",
-            "https://www.googleapis.com/auth/userinfo.profile",
-            "openid"
-        ]
-    )
 
-    if creds.expired or not creds.valid:
-        creds.refresh(GoogleRequest())
+def part_text(part, max_chars: int = BODY_CHAR_BUDGET) -> str:
+    data = part.get("body", {}).get("data")
+    if not data:
+        return ""
 
-    return creds
+    if part.get("mimeType") == "text/html":
+        return html_to_text(iter_base64_text(data), max_chars)
 
-# ============================ GMAIL SERVICE ============================
+    return decode_text_prefix(data, max_chars)
 
-def get_gmail_service(creds):
-    if not creds:
-        raise RuntimeError("Missing Google credentials")
 
-    return build("gmail", "v1", credentials=creds)
-
-# ============================ BODY EXTRACTION ============================
-
-def extract_body(payload):
+def extract_body(payload, max_chars: int = BODY_CHAR_BUDGET):
+    """
+    Return up to max_chars of readable body text, preferring text/plain.
+    HTML parts are parsed incrementally and stop decoding once the budget is met.
+    """
     if payload.get("body", {}).get("data"):
-        return base64.urlsafe_b64decode(
-            payload["body"]["data"]
-        ).decode("utf-8", errors="ignore")
+        return part_text(payload, max_chars)
 
     parts = payload.get("parts", [])
-    html_body = ""
+    html_part = None
 
     for part in parts:
         mime = part.get("mimeType")
 
         if mime == "text/plain" and part.get("body", {}).get("data"):
-            return base64.urlsafe_b64decode(
-                part["body"]["data"]
-            ).decode("utf-8", errors="ignore")
+            return part_text(part, max_chars)
 
         if mime == "text/html" and part.get("body", {}).get("data"):
-            html_body = base64.urlsafe_b64decode(
-                part["body"]["data"]
-            ).decode("utf-8", errors="ignore")
+            html_part = part
 
         if part.get("parts"):
-            nested = extract_body(part)
+            nested = extract_body(part, max_chars)
             if nested:
                 return nested
 
-    return html_body
+    return part_text(html_part, max_chars) if html_part else ""
+
+# ============================ BATCH FETCH ============================
+
+# Gmail accepts up to 100 calls per batch but recommends staying around 50
+BATCH_SIZE = 50
+
+# Retries for calls that fail with a rate limit or server error, inside a
+# batch or on their own; batch retries back off BATCH_BACKOFF_SECONDS * 2**n
+BATCH_RETRIES = 3
+BATCH_BACKOFF_SECONDS = 0.5
+
+RETRYABLE_STATUSES = {429, 500, 502, 503, 504}
+
+
+def _is_retryable(exception):
+    return isinstance(exception, HttpError) and exception.resp.status in RETRYABLE_STATUSES
+
+
+def execute_batched(service, requests):
+    """
+    Run (request_id, HttpRequest) pairs through the Gmail batch endpoint,
+    BATCH_SIZE calls per HTTP round trip.
+
+    Gmail often fails single calls inside a batch with 429 or 5xx; those are
+    sent again in a new batch with exponential backoff, up to BATCH_RETRIES
+    times.
+
+    Returns a dict of request_id -> response. Calls that still fail are
+    logged and skipped.
+    """
+    responses = {}
+
+    if len(requests) == 1:
+        request_id, request = requests[0]
+        try:
+            responses[request_id] = request.execute(num_retries=BATCH_RETRIES)
+        except Exception as e:
+            print(f"Gmail request {request_id} failed: {e}")
+        return responses
+
+    pending = list(requests)
+    by_id = dict(requests)
+
+    for attempt in range(BATCH_RETRIES + 1):
+        failed = []
+
+        def collect(request_id, response, exception):
+            if exception is None:
+                responses[request_id] = response
+            elif _is_retryable(exception) and attempt < BATCH_RETRIES:
+                failed.append((request_id, by_id[request_id]))
+            else:
+                print(f"Gmail request {request_id} failed: {exception}")
+
+        for start in range(0, len(pending), BATCH_SIZE):
+            batch = service.new_batch_http_request(callback=collect)
+            for request_id, request in pending[start:start + BATCH_SIZE]:
+                batch.add(request, request_id=request_id)
+            batch.execute()
+
+        if not failed:
+            break
+
+        time.sleep(BATCH_BACKOFF_SECONDS * 2 ** attempt)
+        pending = failed
+
+    return responses
+
+
+def fetch_messages(service, message_ids, format="full", metadata_headers=None):
+    """
+    Fetch several messages in one batched round trip, preserving order.
+    """
+    extra = {"metadataHeaders": metadata_headers} if metadata_headers else {}
+
+    requests = [
+        (
+            message_id,
+            service.users().messages().get(
+                userId="me",
+                id=message_id,
+                format=format,
+                **extra
+            )
+        )
+        for message_id in message_ids
+    ]
+
+    responses = execute_batched(service, requests)
+    return [responses[m] for m in message_ids if m in responses]
+
+# ============================ METADATA QUERIES ============================
+
+# messages().list returns at most 500 ids per page
+LIST_PAGE_SIZE = 500
+
+# Pages walked by count_messages(exact=True) before settling for an estimate
+COUNT_MAX_PAGES = 10
+
+
+def count_messages(service, query: str, exact: bool = False):
+    """
+    Count messages matching a Gmail query without fetching any payloads.
+
+    Only message ids are requested. If the first page holds every match the
+    count is exact; otherwise Gmail's resultSizeEstimate is used, unless
+    exact=True, in which case up to COUNT_MAX_PAGES id pages are walked.
+
+    Returns {"count": int, "exact": bool}.
+    """
+    count = 0
+    page_token = None
+
+    for _ in range(COUNT_MAX_PAGES):
+        results = service.users().messages().list(
+            userId="me",
+            q=query,
+            maxResults=LIST_PAGE_SIZE,
+            pageToken=page_token,
+            fields="messages/id,nextPageToken,resultSizeEstimate"
+        ).execute()
+
+        count += len(results.get("messages", []))
+        page_token = results.get("nextPageToken")
+
+        if not page_token:
+            return {"count": count, "exact": True}
+
+        if not exact:
+            estimate = results.get("resultSizeEstimate", 0)
+            return {"count": max(count, estimate), "exact": False}
+
+    return {"count": count, "exact": False}
+
+
+def count_unread_from_sender(creds, sender_query: str):
+    service = get_gmail_service(creds)
+    return count_messages(service, f"is:unread from:{sender_query}")
 
 # ============================ ATTACHMENTS ============================
 
-def extract_attachments(payload, service, message_id, attachments_list):
-    parts = payload.get("parts", [])
+def attachment_parts(payload):
+    """
+    Collect every MIME part of a message that points at a downloadable attachment.
+    """
+    found = []
 
-    for part in parts:
+    for part in payload.get("parts", []):
         if part.get("filename") and part.get("body", {}).get("attachmentId"):
-            att_id = part["body"]["attachmentId"]
+            found.append(part)
+
+        if part.get("parts"):
+            found.extend(attachment_parts(part))
+
+    return found
+
+
+def download_attachments(service, message_parts, user_email: str = None):
+    """
+    Download attachments for (message_id, part) pairs in batched round trips.
+
+    Bytes stay in memory and are registered with the content-addressed
+    attachment store; parts already seen for this user and message are not
+    downloaded again.
+
+    Returns a dict of message_id -> list of {"filename", "sha256", "data",
+    "mime_type"}. Parts over the size limit are not fetched and come back as
+    {"filename", "skipped": reason, "mime_type"}.
+    """
+    owner = user_email or ""
+    found = {}
+    requests = []
+
+    for idx, (message_id, part) in enumerate(message_parts):
+        size = part["body"].get("size", 0)
 
-            att = service.users().messages().attachments().get(
+        # Checked from the declared size, before anything is fetched
+        too_large = size_limit_reason(size)
+        if too_large:
+            found[idx] = {"filename": part["filename"], "skipped": too_large}
+            continue
+
+        stored = lookup_attachment(owner, message_id, part["filename"], size)
+
+        if stored:
+            found[idx] = stored
+            continue
+
+        requests.append((
+            str(idx),
+            service.users().messages().attachments().get(
                 userId="me",
                 messageId=message_id,
-                id=att_id
-            ).execute()
-
-            file_data = base64.urlsafe_b64decode(att["data"].encode("utf-8"))
+                id=part["body"]["attachmentId"]
+            )
+        ))
+
+    responses = execute_batched(service, requests)
+
+    for request_id, att in responses.items():
+        message_id, part = message_parts[int(request_id)]
+        file_data = base64.urlsafe_b64decode(att["data"].encode("utf-8"))
+
+        found[int(request_id)] = store_attachment(
+            owner,
+            message_id,
+            part["filename"],
+            part["body"].get("size", 0),
+            file_data
+        )
 
-            os.makedirs("temp_attachments", exist_ok=True)
-            file_path = os.path.join("temp_attachments", part["filename"])
+    downloaded = {}
+    for idx, (message_id, part) in enumerate(message_parts):
+        if idx in found:
+            # Declared type is only a hint; readers sniff the content
+            found[idx]["mime_type"] = part.get("mimeType")
+            downloaded.setdefault(message_id, []).append(found[idx])
 
-            with open(file_path, "wb") as f:
-                f.write(file_data)
+    return downloaded
 
-            attachments_list.append({
-                "filename": part["filename"],
-                "path": file_path
-            })
 
-        if part.get("parts"):
-            extract_attachments(part, service, message_id, attachments_list)
+def extract_attachments(payload, service, message_id, attachments_list, user_email: str = None):
+    downloaded = download_attachments(
+        service,
+        [(message_id, part) for part in attachment_parts(payload)],
+        user_email=user_email
+    )
+    attachments_list.extend(downloaded.get(message_id, []))
 
 # ============================ TEXT CLEANING ============================
 
@@ -143,14 +327,154 @@ def clean_email_text(text: str):
 
     return ". ".join(useful).strip()
 
-# ============================ READ + AI SUMMARIZE EMAILS ============================
+# ============================ SUMMARY CACHE ============================
+
+def get_header(headers, name: str, default: str):
+    return next(
+        (h["value"] for h in headers if h["name"].lower() == name),
+        default
+    )
+
 
-def get_unread_emails(creds, max_results=10, query: str = None):
+def message_content_hash(clean_body: str, payload) -> str:
     """
-    Fetch unread emails and summarize them using AI.
+    Hash the cleaned body plus attachment names and sizes, so a cached
+    summary is only reused while the message content is unchanged.
     """
-    service = get_gmail_service(creds)
+    digest = hashlib.sha256(clean_body.encode("utf-8", errors="ignore"))
+
+    for part in attachment_parts(payload):
+        digest.update(
+            f"\0{part['filename']}:{part['body'].get('size', 0)}".encode("utf-8")
+        )
+
+    return digest.hexdigest()
+
 
+def prepare_message(message_id: str, payload):
+    """
+    Headers, cleaned body and content hash of a fetched message; everything
+    needed to look up or produce its summary.
+    """
+    headers = payload.get("headers", [])
+    clean_body = clean_email_text(extract_body(payload))
+
+    return {
+        "id": message_id,
+        "payload": payload,
+        "from": get_header(headers, "from", "Unknown"),
+        "subject": get_header(headers, "subject", "No Subject"),
+        "clean_body": clean_body,
+        "content_hash": message_content_hash(clean_body, payload)
+    }
+
+
+def cached_summary(message, user_email: str = None):
+    if not user_email:
+        return None
+    return get_cached_summary(user_email, message["id"], message["content_hash"])
+
+
+def attachments_complete(payload, processed) -> bool:
+    """
+    Whether every attachment part of the message was downloaded and read.
+    Skips and errors are usually temporary (a timeout, a failed download),
+    so anything built without them is not cached.
+    """
+    return len(processed) == len(attachment_parts(payload)) and not any(
+        att["type"] in ("Skipped", "Error") for att in processed
+    )
+
+
+def read_attachments(message, attachments):
+    """
+    Attachment text for the LLM, and whether it is complete.
+    """
+    processed = process_all_attachments(attachments) if attachments else []
+    text = create_attachment_summary(processed) if processed else ""
+    return text, attachments_complete(message["payload"], processed)
+
+
+def summarize_prepared(message, attachments, user_email: str = None):
+    """
+    Extract attachments, run the LLM and cache the result.
+    """
+    text, complete = read_attachments(message, attachments)
+
+    try:
+        summary = summarize_email_logic(
+            body=message["clean_body"],
+            sender=message["from"],
+            subject=message["subject"],
+            attachments=text,
+            fallback=False
+        )
+    except Exception:
+        # Degraded summaries are not cached
+        return fallback_summary(message["clean_body"], message["subject"])
+
+    if user_email and complete:
+        save_cached_summary(user_email, message["id"], message["content_hash"], summary)
+
+    return summary
+
+
+def summarize_prepared_batch(messages, attachments_by_id, user_email: str = None):
+    """
+    Summarize several prepared messages with batched LLM calls (one request
+    per token-budgeted group instead of one per email) and cache the results.
+
+    Returns a dict of message id -> summary.
+    """
+    if len(messages) == 1:
+        message = messages[0]
+        return {
+            message["id"]: summarize_prepared(
+                message,
+                attachments_by_id.get(message["id"], []),
+                user_email=user_email
+            )
+        }
+
+    read = {
+        message["id"]: read_attachments(message, attachments_by_id.get(message["id"], []))
+        for message in messages
+    }
+
+    summaries = summarize_emails_batch([
+        {
+            "id": message["id"],
+            "from": message["from"],
+            "subject": message["subject"],
+            "body": message["clean_body"],
+            "attachments": read[message["id"]][0]
+        }
+        for message in messages
+    ], fallback=False)
+
+    for message in messages:
+        if message["id"] in summaries:
+            # Summaries missing an attachment are redone next time
+            if user_email and read[message["id"]][1]:
+                save_cached_summary(user_email, message["id"], message["content_hash"], summaries[message["id"]])
+        else:
+            # Degraded summaries are not cached
+            summaries[message["id"]] = fallback_summary(message["clean_body"], message["subject"])
+
+    return summaries
+
+# ============================ SUMMARY PIPELINE ============================
+
+# How far into each message the pipeline reads
+DEPTH_HEADERS = "headers"   # From / Subject; one metadata fetch, no LLM
+DEPTH_SNIPPET = "snippet"   # plus Gmail's snippet; still metadata only
+DEPTH_FULL = "full"         # body + attachments, summarized by the LLM
+DEPTHS = (DEPTH_HEADERS, DEPTH_SNIPPET, DEPTH_FULL)
+
+MAX_TOP_N = 20
+
+
+def list_unread_ids(service, top_n: int, query: str = None):
     q = ["is:unread"]
     if query:
         q.append(query)
@@ -158,99 +482,233 @@ def get_unread_emails(creds, max_results=10, query: str = None):
     results = service.users().messages().list(
         userId="me",
         q=" ".join(q),
-        maxResults=max_results
+        maxResults=top_n,
+        fields="messages/id"
     ).execute()
 
-    emails = []
+    return [msg["id"] for msg in results.get("messages", [])]
 
-    for msg in results.get("messages", []):
-        msg_data = service.users().messages().get(
-            userId="me",
-            id=msg["id"],
-            format="full"
-        ).execute()
 
-        payload = msg_data.get("payload", {})
-        headers = payload.get("headers", [])
+def summarize_unread(creds, depth: str = DEPTH_FULL, top_n: int = 3, query: str = None, user_email: str = None):
+    """
+    Summary pipeline for the newest top_n unread messages.
 
-        sender = next(
-            (h["value"] for h in headers if h["name"].lower() == "from"),
-            "Unknown"
-        )
+    Each message is fetched once (one batched round trip) at the cost its
+    depth needs: headers and snippet use format=metadata, full fetches the
+    body. At full depth cached summaries are reused, and attachments are
+    downloaded in one batch for the cache misses only; the misses are then
+    summarized together in token-budgeted LLM batches.
 
-        subject = next(
-            (h["value"] for h in headers if h["name"].lower() == "subject"),
-            "No Subject"
-        )
+    Returns a list of {"id", "from", "subject"} plus "snippet" (snippet
+    depth) or "summary" and "attachments" (full depth).
+    """
+    if depth not in DEPTHS:
+        depth = DEPTH_FULL
+    top_n = max(1, min(int(top_n or 1), MAX_TOP_N))
 
-        body = extract_body(payload)
-        clean_body = clean_email_text(body)
+    service = get_gmail_service(creds)
+    message_ids = list_unread_ids(service, top_n, query)
+    if message_ids:
+        report_progress(f"Fetching {len(message_ids)} email{'s' if len(message_ids) != 1 else ''}")
+
+    if depth != DEPTH_FULL:
+        emails = fetch_unread_metadata(service, message_ids)
+        return [
+            {
+                "id": m["id"],
+                "from": m["from"],
+                "subject": m["subject"],
+                **({"snippet": m["snippet"]} if depth == DEPTH_SNIPPET else {})
+            }
+            for m in emails
+        ]
 
-        attachments = []
-        extract_attachments(payload, service, msg["id"], attachments)
+    messages = [
+        prepare_message(msg_data["id"], msg_data.get("payload", {}))
+        for msg_data in fetch_messages(service, message_ids)
+    ]
 
-        attachment_text = ""
-        if attachments:
-            processed = process_all_attachments(attachments)
-            attachment_text = create_attachment_summary(processed)
+    summaries = {}
+    for message in messages:
+        cached = cached_summary(message, user_email)
+        if cached is not None:
+            summaries[message["id"]] = cached
+
+    attachments_by_id = download_attachments(service, [
+        (message["id"], part)
+        for message in messages
+        if message["id"] not in summaries
+        for part in attachment_parts(message["payload"])
+    ], user_email=user_email)
+
+    misses = [message for message in messages if message["id"] not in summaries]
+    if misses:
+        report_progress(f"Summarizing {len(misses)} email{'s' if len(misses) != 1 else ''}")
+        summaries.update(summarize_prepared_batch(misses, attachments_by_id, user_email=user_email))
+
+    emails = [
+        {
+            "id": message["id"],
+            "from": message["from"],
+            "subject": message["subject"],
+            "summary": summaries[message["id"]],
+            "attachments": attachments_by_id.get(message["id"], [])
+        }
+        for message in messages
+    ]
 
-        summary = summarize_email_logic(
-            body=clean_body,
-            sender=sender,
-            subject=subject,
-            attachments=attachment_text
-        )
+    return emails
 
-        emails.append({
-            "id": msg["id"],
-            "from": sender,
-            "subject": subject,
-            "summary": summary,
-            "attachments": attachments
-        })
+# ============================ INCREMENTAL SYNC ============================
 
-    return emails
-def summarize_email(service, message_id: str):
+# Upper bound on messages pulled into the mirror by a full resync
+MIRROR_MAX_MESSAGES = 200
+
+# Labels that take a message out of the unread view
+HIDDEN_LABELS = {"TRASH", "SPAM"}
+
+
+def fetch_unread_metadata(service, message_ids):
     """
-    Summarize a single email by ID.
-    This exists because app.py IMPORTS IT.
+    Fetch From/Subject/snippet for several messages in one batched round trip.
     """
-    msg_data = service.users().messages().get(
-        userId="me",
-        id=message_id,
-        format="full"
-    ).execute()
+    messages = fetch_messages(
+        service,
+        message_ids,
+        format="metadata",
+        metadata_headers=["From", "Subject"]
+    )
 
-    payload = msg_data.get("payload", {})
-    headers = payload.get("headers", [])
+    return [
+        {
+            "id": m["id"],
+            "thread_id": m.get("threadId"),
+            "from": get_header(m.get("payload", {}).get("headers", []), "from", "Unknown"),
+            "subject": get_header(m.get("payload", {}).get("headers", []), "subject", "No Subject"),
+            # Gmail returns the snippet HTML-escaped
+            "snippet": html.unescape(m.get("snippet", "")),
+            "internal_date": int(m.get("internalDate", 0))
+        }
+        for m in messages
+    ]
 
-    sender = next(
-        (h["value"] for h in headers if h["name"].lower() == "from"),
-        "Unknown"
-    )
 
-    subject = next(
-        (h["value"] for h in headers if h["name"].lower() == "subject"),
-        "No Subject"
-    )
+def full_unread_sync(service, user_email: str):
+    """
+    Rebuild the unread mirror from scratch and record the current historyId.
+    """
+    # Read the historyId first so changes made during the resync are replayed next time
+    history_id = service.users().getProfile(userId="me").execute()["historyId"]
+
+    message_ids = []
+    page_token = None
 
-    body = extract_body(payload)
-    clean_body = clean_email_text(body)
+    while len(message_ids) < MIRROR_MAX_MESSAGES:
+        results = service.users().messages().list(
+            userId="me",
+            q="is:unread",
+            maxResults=min(500, MIRROR_MAX_MESSAGES - len(message_ids)),
+            pageToken=page_token,
+            fields="messages/id,nextPageToken"
+        ).execute()
 
-    attachments = []
-    extract_attachments(payload, service, message_id, attachments)
+        message_ids.extend(m["id"] for m in results.get("messages", []))
+        page_token = results.get("nextPageToken")
+        if not page_token:
+            break
 
-    attachment_text = ""
-    if attachments:
-        processed = process_all_attachments(attachments)
-        attachment_text = create_attachment_summary(processed)
+    messages = fetch_unread_metadata(service, message_ids)
+    save_unread_sync(user_email, history_id, upserts=messages, replace=True)
 
-    return summarize_email_logic(
-        body=clean_body,
-        sender=sender,
-        subject=subject,
-        attachments=attachment_text
-    )
+    return {"added": messages, "removed": [], "full_sync": True}
+
+
+def sync_unread(service, user_email: str):
+    """
+    Bring the local unread mirror up to date using users().history().list.
+
+    Only messages added, removed or relabeled since the stored historyId are
+    fetched. Falls back to a full resync on first use or when Gmail has
+    expired the stored historyId (HTTP 404).
+
+    Returns {"added": [...], "removed": [...], "full_sync": bool}.
+    """
+    start_history_id = get_history_id(user_email)
+    if not start_history_id:
+        return full_unread_sync(service, user_email)
+
+    # message id -> True (unread) / False (gone from the unread view)
+    changes = {}
+    latest_history_id = start_history_id
+    page_token = None
+
+    try:
+        while True:
+            results = service.users().history().list(
+                userId="me",
+                startHistoryId=start_history_id,
+                historyTypes=["messageAdded", "messageDeleted", "labelAdded", "labelRemoved"],
+                pageToken=page_token
+            ).execute()
+
+            for record in results.get("history", []):
+                for added in record.get("messagesAdded", []):
+                    msg = added["message"]
+                    labels = set(msg.get("labelIds", []))
+                    changes[msg["id"]] = "UNREAD" in labels and not labels & HIDDEN_LABELS
+
+                for deleted in record.get("messagesDeleted", []):
+                    changes[deleted["message"]["id"]] = False
+
+                for labeled in record.get("labelsAdded", []):
+                    msg = labeled["message"]
+                    labels = set(labeled.get("labelIds", []))
+                    if labels & HIDDEN_LABELS:
+                        changes[msg["id"]] = False
+                    elif "UNREAD" in labels:
+                        # Marked unread while in Trash/Spam stays out of the view
+                        current = labels | set(msg.get("labelIds", []))
+                        changes[msg["id"]] = not current & HIDDEN_LABELS
+
+                for unlabeled in record.get("labelsRemoved", []):
+                    msg = unlabeled["message"]
+                    if "UNREAD" in unlabeled.get("labelIds", []):
+                        changes[msg["id"]] = False
+                    elif set(unlabeled.get("labelIds", [])) & HIDDEN_LABELS:
+                        # Restored from Trash/Spam: back in the view if still unread
+                        labels = set(msg.get("labelIds", []))
+                        changes[msg["id"]] = "UNREAD" in labels and not labels & HIDDEN_LABELS
+
+            latest_history_id = results.get("historyId", latest_history_id)
+            page_token = results.get("nextPageToken")
+            if not page_token:
+                break
+
+    except HttpError as e:
+        if e.resp.status == 404:
+            return full_unread_sync(service, user_email)
+        raise
+
+    added_ids = [message_id for message_id, unread in changes.items() if unread]
+    removed_ids = [message_id for message_id, unread in changes.items() if not unread]
+
+    added = fetch_unread_metadata(service, added_ids) if added_ids else []
+    save_unread_sync(user_email, latest_history_id, upserts=added, removed_ids=removed_ids)
+
+    return {"added": added, "removed": removed_ids, "full_sync": False}
+
+
+def get_new_emails(creds, user_email: str):
+    """
+    Sync the unread mirror and return what changed plus the current unread
+    view: the newest messages and the total number mirrored.
+    """
+    service = get_gmail_service(creds)
+    report_progress("Checking for new mail")
+    changes = sync_unread(service, user_email)
+    changes["unread"] = get_unread_mirror(user_email)
+    changes["unread_count"] = count_unread_mirror(user_email)
+    return changes
 
 # ============================ SEND EMAIL ============================
 
@@ -0,0 +1,94 @@
+# services/google_services.py
+import json
+import threading
+from collections import OrderedDict
+
+import httplib2
+import google_auth_httplib2
+from googleapiclient import discovery_cache
+from googleapiclient.discovery import build_from_document
+from googleapiclient.http import HttpRequest
+
+# Upper bound on per-user service objects kept alive
+MAX_CACHED_SERVICES = 256
+
+_documents = {}
+_services = OrderedDict()
+_lock = threading.Lock()
+
+# One httplib2.Http per thread, shared by every service used on it
+_local = threading.local()
+
+
+def get_discovery_document(name: str, version: str) -> dict:
+    """
+    Parsed discovery document, read once from the copy bundled with
+    google-api-python-client (no network fetch).
+    """
+    key = (name, version)
+    document = _documents.get(key)
+
+    if document is None:
+        content = discovery_cache.get_static_doc(name, version)
+        if content is None:
+            raise RuntimeError(f"No bundled discovery document for {name} {version}")
+
+        document = json.loads(content)
+        _documents[key] = document
+
+    return document
+
+
+def _thread_http():
+    """
+    httplib2.Http is not thread-safe, but within one thread it keeps its
+    connections open, so each thread reuses its own across API calls.
+    """
+    http = getattr(_local, "http", None)
+    if http is None:
+        http = _local.http = httplib2.Http()
+    return http
+
+
+def _request_builder(creds):
+    # Requests go over the calling thread's connection rather than the one
+    # owned by the cached service object, which threads would share
+    def build_request(http, *args, **kwargs):
+        authorized = google_auth_httplib2.AuthorizedHttp(creds, http=_thread_http())
+        return HttpRequest(authorized, *args, **kwargs)
+
+    return build_request
+
+
+def get_service(name: str, version: str, creds):
+    """
+    Return a cached API service bound to these credentials.
+
+    Services are keyed by credentials object; the token manager hands out
+    one object per user and refreshes it in place, so each user keeps the
+    same service across requests.
+    """
+    if not creds:
+        raise RuntimeError("Missing Google credentials")
+
+    key = (name, version, id(creds))
+
+    with _lock:
+        entry = _services.get(key)
+        if entry and entry[0] is creds:
+            _services.move_to_end(key)
+            return entry[1]
+
+    service = build_from_document(
+        get_discovery_document(name, version),
+        credentials=creds,
+        requestBuilder=_request_builder(creds)
+    )
+
+    with _lock:
+        _services[key] = (creds, service)
+        _services.move_to_end(key)
+        while len(_services) > MAX_CACHED_SERVICES:
+            _services.popitem(last=False)
+
+    return service
@@ -0,0 +1,180 @@
+# services/html_text.py
+import base64
+import codecs
+import re
+from html.parser import HTMLParser
+
+# Base64 characters decoded per step (multiple of 4)
+DECODE_CHUNK = 16384
+
+# Elements whose content is never shown to the reader
+SKIP_TAGS = {"style", "script", "head", "title", "noscript", "template", "svg"}
+
+# Elements without an end tag
+VOID_TAGS = {
+    "area", "base", "br", "col", "embed", "hr", "img", "input",
+    "link", "meta", "param", "source", "track", "wbr"
+}
+
+BLOCK_TAGS = {
+    "p", "div", "br", "tr", "li", "ul", "ol", "table", "section", "article",
+    "header", "footer", "h1", "h2", "h3", "h4", "h5", "h6", "blockquote", "hr"
+}
+
+# Table cells are kept apart by a space, not a line break
+CELL_TAGS = {"td", "th"}
+
+# Elements whose end tag may be left out: a sibling start tag, or the end of
+# the enclosing element, closes them
+IMPLIED_END_TAGS = {"p", "li", "td", "th", "tr", "dt", "dd", "option"}
+
+# End tags that close an open implied-end element
+CONTAINER_TAGS = BLOCK_TAGS | {"td", "th", "tbody", "thead", "tfoot", "dl", "select", "body", "html"}
+
+# Allowed inside <head>; any other tag means the body has started
+HEAD_TAGS = {"title", "meta", "link", "style", "script", "base", "noscript", "template"}
+
+HIDDEN_STYLE = re.compile(
+    r"display\s*:\s*none|visibility\s*:\s*hidden|max-height\s*:\s*0|"
+    r"font-size\s*:\s*0|opacity\s*:\s*0(?:\.0+)?\s*(?:;|$)",
+    re.IGNORECASE
+)
+
+
+class _BudgetReached(Exception):
+    pass
+
+
+class VisibleTextParser(HTMLParser):
+    """
+    Streaming HTML parser that keeps only visible text and stops once
+    max_chars characters have been collected.
+    """
+
+    def __init__(self, max_chars: int):
+        super().__init__(convert_charrefs=True)
+        self.max_chars = max_chars
+        self.parts = []
+        self.length = 0
+        self.skip_tag = None
+        self.skip_depth = 0
+
+    def _is_hidden(self, tag, attrs):
+        if tag in SKIP_TAGS:
+            return True
+
+        attrs = dict(attrs)
+        if "hidden" in attrs or attrs.get("aria-hidden") == "true":
+            return True
+
+        return bool(HIDDEN_STYLE.search(attrs.get("style") or ""))
+
+    def _starts_after_skip(self, tag):
+        """
+        Whether start tag tag implicitly closes the element being skipped:
+        a body-level tag ends an unclosed <head>, and an implied-end
+        element such as <p> is closed by its next sibling (or, for <p>,
+        by any block) instead of nesting.
+        """
+        if self.skip_tag == "head":
+            return tag not in HEAD_TAGS
+        if self.skip_tag == tag:
+            return tag in IMPLIED_END_TAGS
+        return self.skip_tag == "p" and tag in BLOCK_TAGS and tag != "br"
+
+    def handle_starttag(self, tag, attrs):
+        if self.skip_tag:
+            if not self._starts_after_skip(tag):
+                if tag == self.skip_tag:
+                    self.skip_depth += 1
+                return
+            self.skip_tag = None
+
+        if tag not in VOID_TAGS and self._is_hidden(tag, attrs):
+            self.skip_tag = tag
+            self.skip_depth = 1
+            return
+
+        if tag in BLOCK_TAGS:
+            self.parts.append("\n")
+        elif tag in CELL_TAGS:
+            self.parts.append(" ")
+
+    def handle_endtag(self, tag):
+        if self.skip_tag:
+            if tag == self.skip_tag:
+                self.skip_depth -= 1
+                if self.skip_depth == 0:
+                    self.skip_tag = None
+                return
+            if self.skip_tag not in IMPLIED_END_TAGS or tag not in CONTAINER_TAGS:
+                return
+            # e.g. </ul> closing an unclosed hidden <li>
+            self.skip_tag = None
+
+        if tag in BLOCK_TAGS:
+            self.parts.append("\n")
+        elif tag in CELL_TAGS:
+            self.parts.append(" ")
+
+    def handle_data(self, data):
+        if self.skip_tag:
+            return
+
+        if not data.strip():
+            # Whitespace between inline elements separates words; text()
+            # collapses the runs this leaves
+            self.parts.append(" ")
+            return
+
+        self.parts.append(data)
+        self.length += len(data)
+
+        if self.length >= self.max_chars:
+            raise _BudgetReached()
+
+    def text(self):
+        text = "".join(self.parts)
+        text = re.sub(r"[ \t\r\f\v\u00a0\u200c]+", " ", text)
+        text = re.sub(r"\s*\n\s*", "\n", text)
+        return text.strip()[:self.max_chars]
+
+
+def iter_base64_text(data: str, chunk_size: int = DECODE_CHUNK):
+    """
+    Decode Gmail's urlsafe base64 body data incrementally.
+    """
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="ignore")
+
+    for start in range(0, len(data), chunk_size):
+        chunk = data[start:start + chunk_size]
+        # Only the final chunk may need padding
+        chunk += "=" * (-len(chunk) % 4)
+        yield decoder.decode(base64.urlsafe_b64decode(chunk))
+
+
+def html_to_text(chunks, max_chars: int) -> str:
+    """
+    Visible text of an HTML document given as an iterable of string chunks.
+    Style, script and hidden elements are dropped, and parsing stops as soon
+    as max_chars characters of text have been collected.
+    """
+    parser = VisibleTextParser(max_chars)
+
+    try:
+        for chunk in chunks:
+            parser.feed(chunk)
+        parser.close()
+    except _BudgetReached:
+        pass
+
+    return parser.text()
+
+
+def decode_text_prefix(data: str, max_chars: int) -> str:
+    """
+    Decode only the start of a base64 text/plain body: at most 4 UTF-8
+    bytes per character are needed for max_chars characters.
+    """
+    needed = ((max_chars * 4 + 2) // 3) * 4
+    return "".join(iter_base64_text(data[:needed]))[:max_chars]
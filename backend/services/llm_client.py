@@ -1,7 +1,14 @@
 import os
 import json
+import hashlib
+import threading
+from collections import OrderedDict
 from groq import Groq
 
+from db import get_llm_cache, save_llm_cache, count_llm_cache
+from services.token_budget import budget_sections
+from services.progress import report_progress, report_token, streaming_tokens
+
 client = Groq(api_key=os.getenv("GROQ_API_KEY"))
 
 # ===================== TOOLS =====================
@@ -10,10 +17,20 @@ tools = [
         "type": "function",
         "function": {
             "name": "get_unread_emails_summary",
-            "description": "Get summaries of all unread emails in the inbox",
+            "description": "Get summaries of the latest unread emails in the inbox",
             "parameters": {
                 "type": "object",
-                "properties": {},
+                "properties": {
+                    "depth": {
+                        "type": "string",
+                        "enum": ["headers", "snippet", "full"],
+                        "description": "headers = sender and subject only, snippet = plus a preview line, full = AI summary (default)"
+                    },
+                    "top_n": {
+                        "type": "integer",
+                        "description": "How many of the newest unread emails to include (default 3)"
+                    }
+                },
                 "required": []
             }
         }
@@ -30,6 +47,35 @@ tools = [
             }
         }
     },
+    {
+        "type": "function",
+        "function": {
+            "name": "get_new_emails",
+            "description": "Check what is new in the inbox since the user last checked",
+            "parameters": {
+                "type": "object",
+                "properties": {},
+                "required": []
+            }
+        }
+    },
+    {
+        "type": "function",
+        "function": {
+            "name": "read_email_attachment",
+            "description": "Read the attachments (PDF, Word, Excel, CSV, images) of the latest unread email that has attachments and answer a question about them",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "question": {
+                        "type": "string",
+                        "description": "The user's question about the attached document"
+                    }
+                },
+                "required": ["question"]
+            }
+        }
+    },
     {
         "type": "function",
         "function": {
@@ -100,24 +146,254 @@ tools = [
 
 ]
 
+# ===================== RESPONSE CACHE =====================
+MODEL = "llama-3.1-8b-instant"
+
+# Only near-deterministic calls are reused; above this, variety is intended
+LLM_CACHE_MAX_TEMPERATURE = 0.3
+LLM_CACHE_MAX_ENTRIES = 512
+
+# Optional second tier in SQLite, shared by workers and kept across restarts
+LLM_CACHE_SQLITE = os.environ.get("LLM_CACHE_SQLITE", "0") == "1"
+LLM_CACHE_TTL_SECONDS = int(os.environ.get("LLM_CACHE_TTL_SECONDS", 24 * 60 * 60))
+LLM_CACHE_DB_MAX_ENTRIES = 20000
+
+_llm_cache = OrderedDict()
+_llm_cache_lock = threading.Lock()
+_llm_cache_stats = {"memory_hits": 0, "sqlite_hits": 0, "misses": 0, "uncached": 0}
+
+
+def _count_llm_cache(result: str):
+    with _llm_cache_lock:
+        _llm_cache_stats[result] += 1
+
+
+def llm_cache_key(model: str, messages: list, temperature: float, tools: list = None, **params) -> str:
+    """
+    Hash of everything that shapes the response: model, messages,
+    temperature, tool schema and other request params (max_tokens,
+    response_format).
+    """
+    request = {
+        "model": model,
+        "messages": messages,
+        "temperature": temperature,
+        "tools": tools,
+        "params": params
+    }
+    return hashlib.sha256(
+        json.dumps(request, sort_keys=True, ensure_ascii=False).encode("utf-8")
+    ).hexdigest()
+
+
+def _cache_lookup(key: str):
+    with _llm_cache_lock:
+        if key in _llm_cache:
+            _llm_cache.move_to_end(key)
+            _llm_cache_stats["memory_hits"] += 1
+            return _llm_cache[key]
+
+    if LLM_CACHE_SQLITE:
+        cached = get_llm_cache(key, LLM_CACHE_TTL_SECONDS)
+        if cached is not None:
+            _count_llm_cache("sqlite_hits")
+            _cache_remember(key, cached)
+            return cached
+
+    _count_llm_cache("misses")
+    return None
+
+
+def _cache_remember(key: str, content: str):
+    with _llm_cache_lock:
+        _llm_cache[key] = content
+        _llm_cache.move_to_end(key)
+        while len(_llm_cache) > LLM_CACHE_MAX_ENTRIES:
+            _llm_cache.popitem(last=False)
+
+
+def complete(messages: list, temperature: float, max_tokens: int, cache: bool = True, stream: bool = False, **params) -> str:
+    """
+    Text completion through the response cache. Calls at or below
+    LLM_CACHE_MAX_TEMPERATURE with identical requests are answered from
+    memory (or SQLite, when enabled) without network I/O.
+
+    stream=True marks a user-facing reply: when a streaming /command is
+    listening, its tokens are reported as Groq produces them.
+    """
+    cacheable = cache and temperature <= LLM_CACHE_MAX_TEMPERATURE
+    stream = stream and streaming_tokens()
+
+    if cacheable:
+        key = llm_cache_key(MODEL, messages, temperature, max_tokens=max_tokens, **params)
+        cached = _cache_lookup(key)
+        if cached is not None:
+            if stream:
+                report_token(cached)
+            return cached
+    else:
+        _count_llm_cache("uncached")
+
+    if stream:
+        content = "".join(_stream_content(client.chat.completions.create(
+            model=MODEL,
+            messages=messages,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            stream=True,
+            **params
+        ))).strip()
+    else:
+        response = client.chat.completions.create(
+            model=MODEL,
+            messages=messages,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            **params
+        )
+        content = (response.choices[0].message.content or "").strip()
+
+    if cacheable and content:
+        _cache_remember(key, content)
+        if LLM_CACHE_SQLITE:
+            save_llm_cache(key, content, LLM_CACHE_TTL_SECONDS, LLM_CACHE_DB_MAX_ENTRIES)
+
+    return content
+
+
+def _stream_content(chunks):
+    """
+    Yield and report the text deltas of a streamed completion.
+    """
+    for chunk in chunks:
+        if not chunk.choices:
+            continue
+        text = chunk.choices[0].delta.content
+        if text:
+            report_token(text)
+            yield text
+
+
+def get_llm_cache_stats():
+    """Hit/miss counters for this process, per tier"""
+    with _llm_cache_lock:
+        stats = dict(_llm_cache_stats)
+        stats["memory_entries"] = len(_llm_cache)
+
+    lookups = stats["memory_hits"] + stats["sqlite_hits"] + stats["misses"]
+    hits = stats["memory_hits"] + stats["sqlite_hits"]
+    stats["hit_ratio"] = round(hits / lookups, 3) if lookups else 0.0
+    stats["sqlite_entries"] = count_llm_cache() if LLM_CACHE_SQLITE else None
+    return stats
+
 # ===================== BASIC LLM =====================
-def call_llm(prompt: str) -> str:
-    response = client.chat.completions.create(
-        model="llama-3.1-8b-instant",
+SUMMARIZER_SYSTEM_PROMPT = "You are an expert email summarizer. Summarize emails concisely in 2-3 sentences, mentioning key points from both the email body and any attachments."
+
+
+def call_llm(prompt: str, system_prompt: str = None, max_tokens: int = 500, json_output: bool = False, cache: bool = True) -> str:
+    """
+    Single-turn completion. json_output asks Groq for a JSON object reply;
+    cache=False always calls the API (for prompts that should vary).
+    """
+    extra = {"response_format": {"type": "json_object"}} if json_output else {}
+
+    return complete(
         messages=[
             {
                 "role": "system",
-                "content": "You are an expert email summarizer. Summarize emails concisely in 2-3 sentences, mentioning key points from both the email body and any attachments."
+                "content": system_prompt or SUMMARIZER_SYSTEM_PROMPT
             },
             {"role": "user", "content": prompt}
         ],
         temperature=0.3,
-        max_tokens=500
+        max_tokens=max_tokens,
+        cache=cache,
+        **extra
     )
 
-    return response.choices[0].message.content.strip()
+def answer_from_attachment(question: str, attachment_text: str) -> str:
+    return complete(
+        messages=[
+            {
+                "role": "system",
+                "content": "You answer questions about email attachments. Base your answer ONLY on the attachment content below. If the answer is not in it, say so briefly.\n\n" + attachment_text
+            },
+            {"role": "user", "content": question}
+        ],
+        temperature=0.3,
+        max_tokens=500,
+        stream=True
+    )
 
 # ===================== INTELLIGENT HANDLER =====================
+def decide_intent(messages: list):
+    """
+    Tool-selection call. Returns (reply text, (tool name, arguments JSON)
+    or None) for the first tool call.
+
+    When a streaming /command is listening, the call streams: a direct reply
+    is reported token by token, and tool calls are assembled from their deltas.
+    """
+    request = dict(
+        model=MODEL,
+        messages=messages,
+        tools=tools,
+        tool_choice="auto",
+        temperature=0.7,
+        max_tokens=500
+    )
+
+    if not streaming_tokens():
+        message = client.chat.completions.create(**request).choices[0].message
+        if message.tool_calls:
+            first = message.tool_calls[0]
+            return message.content, (first.function.name, first.function.arguments)
+        return message.content, None
+
+    content = []
+    calls = {}
+
+    for chunk in client.chat.completions.create(stream=True, **request):
+        if not chunk.choices:
+            continue
+        delta = chunk.choices[0].delta
+
+        if delta.content:
+            report_token(delta.content)
+            content.append(delta.content)
+
+        for call in delta.tool_calls or []:
+            entry = calls.setdefault(call.index, {"name": "", "arguments": ""})
+            if call.function and call.function.name:
+                entry["name"] += call.function.name
+            if call.function and call.function.arguments:
+                entry["arguments"] += call.function.arguments
+
+    if calls:
+        first = calls[min(calls)]
+        return "".join(content), (first["name"], first["arguments"])
+    return "".join(content), None
+
+
+SYSTEM_PROMPT = """You are InboxAI, a friendly assistant for email, inbox management and meeting scheduling. You also answer general knowledge questions directly and concisely.
+
+Use a tool when the request is about the user's mail or calendar:
+- last email → get_last_email_summary
+- unread emails / summarize my inbox → get_unread_emails_summary (depth "headers" or "snippet" to just list them)
+- what's new / anything new in my inbox → get_new_emails
+- emails from a sender ("GitHub", "LinkedIn", "from X") → check_emails_from_sender with the sender name
+- categories, labels or types of emails → get_unread_email_categories
+- questions about an attachment (PDF, invoice, report, spreadsheet, image) → read_email_attachment with the question
+- schedule, set up or plan a meeting or call → create_meeting; dates as YYYY-MM-DD, times as HH:MM (24-hour); ask for missing details only if required
+
+Otherwise reply conversationally: greet users warmly, keep answers short, friendly and confident, and don't mention limitations unless necessary."""
+
+ATTACHMENT_PROMPT = """
+
+If the user asks about an attached document, base your answer ONLY on the attachment content.
+ATTACHMENT CONTENT:
+"""
+
 def intelligent_command_handler(
     user_message: str,
     function_map: dict,
@@ -127,110 +403,60 @@ def intelligent_command_handler(
     """
     Intelligent command handler using function calling.
 
+    The prompt is assembled from per-section token budgets (see
+    services/token_budget.py); history and attachments are trimmed first.
+
     ALWAYS returns:
     {
         "reply": str,
-        "data": dict | None
+        "data": dict | None,
+        "tokens": {section: estimated prompt tokens, "total": ...}
     }
     """
 
-    messages = [
-        {
-            "role": "system",
-            "content": f"""
-            
-You are InboxAI, a smart AI assistant.
-
-Your primary role is to help users with emails, inbox management, and scheduling meetings.
-However, you are also capable of answering general knowledge questions naturally and concisely.
-
-Behavior rules:
-- If the user's question is about emails, inbox, meetings, or scheduling, use the appropriate tools.
-- If the user's question is general knowledge or casual conversation, answer directly without refusing.
-- Keep answers short and clear unless the user asks for detail.
-- Be friendly, confident, and natural.
-- Do NOT mention limitations unless absolutely necessary.
-
-When users greet you (hello, hi, hey, etc.), respond warmly and naturally.
-When users ask about their emails, use the appropriate function to help them.
-Keep responses conversational and natural - don't be robotic.
-
-Examples:
-- "hello" → Greet them back warmly
-- "what's my last email?" → Use get_last_email_summary
-- "show unread emails" → Use get_unread_emails_summary
-- If the user asks about categories, labels, types, or classification of emails,
-use get_unread_email_categories.
-- If the user asks whether they have emails from a specific sender
-(e.g., "GitHub", "Google", "LinkedIn", "from X"),
-use check_emails_from_sender with the sender name as parameter.
-- "summarize my inbox" → Use get_unread_emails_summary
-You can help users with:
-- Reading and summarizing emails
-- Categorizing emails
-- Checking emails from specific senders
-- Scheduling meetings using Google Calendar
-
-Rules:
-- If the user asks to schedule, create, set up, or plan a meeting or call,
-  extract meeting details and call the function `create_meeting`.
-- Always convert dates to YYYY-MM-DD and time to HH:MM (24-hour format).
-- Ask for missing details ONLY if absolutely required.
-- Be concise, friendly, and confident.
-
-Examples:
-- "schedule a meeting tomorrow at 4pm with john@gmail.com"
-  → call create_meeting
-- "set up a call with the team on friday"
-  → call create_meeting
-If attachment content is provided, you MUST use it when answering.
-If the user asks about an attached document, base your answer ONLY on the attachment content.
-ATTACHMENT CONTENT (if any):
-{attachment_summary}
+    sections, tokens = budget_sections({
+        "system": SYSTEM_PROMPT,
+        "tools": tools,
+        "attachments": attachment_summary or "",
+        "history": history or [],
+        "user": user_message
+    })
 
-"""
-        }
-    ]
+    system_content = sections["system"]
+    if sections["attachments"]:
+        system_content += ATTACHMENT_PROMPT + sections["attachments"]
+
+    messages = [{"role": "system", "content": system_content}]
 
-    # Add conversation history if available
-    if history:
-        messages.extend(history)
+    # Most recent turns that fit the history budget
+    messages.extend(sections["history"])
 
-    # Add current user message
     messages.append({
         "role": "user",
-        "content": user_message
+        "content": sections["user"]
     })
 
     # -------- First call: decide intent --------
-    response = client.chat.completions.create(
-        model="llama-3.1-8b-instant",
-        messages=messages,
-        tools=tools,
-        tool_choice="auto",
-        temperature=0.7,
-        max_tokens=500
-    )
-
-    response_message = response.choices[0].message
-    tool_calls = response_message.tool_calls
+    report_progress("Thinking")
+    content, tool_call = decide_intent(messages)
 
     # 🟢 NO TOOL CALL → GREETING / CHAT
-    if not tool_calls:
+    if not tool_call:
         return {
-            "reply": response_message.content or "I'm here to help with your emails!",
-            "data": None
+            "reply": content or "I'm here to help with your emails!",
+            "data": None,
+            "tokens": tokens
         }
 
     # -------- Execute tool (ONLY FIRST TOOL CALL) --------
-    tool_call = tool_calls[0]
-    function_name = tool_call.function.name
-    function_args = json.loads(tool_call.function.arguments or "{}")
+    function_name, arguments = tool_call
+    function_args = json.loads(arguments or "{}")
 
     if function_name not in function_map:
         return {
             "reply": "Sorry, I can't handle that request yet.",
-            "data": None
+            "data": None,
+            "tokens": tokens
         }
 
     try:
@@ -241,18 +467,21 @@ ATTACHMENT CONTENT (if any):
     except Exception as e:
         return {
             "reply": "Something went wrong while fetching your emails.",
-            "data": {"error": str(e)}
+            "data": {"error": str(e)},
+            "tokens": tokens
         }
 
     # -------- FORCE STANDARD RESPONSE FORMAT --------
     if isinstance(function_result, dict):
         return {
             "reply": function_result.get("reply", ""),
-            "data": function_result.get("data")
+            "data": function_result.get("data"),
+            "tokens": tokens
         }
 
     # Fallback safety net
     return {
         "reply": str(function_result),
-        "data": None
+        "data": None,
+        "tokens": tokens
     }
@@ -0,0 +1,38 @@
+# services/progress.py
+import threading
+from contextlib import contextmanager
+
+# Listeners of the request running on this thread (streaming /command only)
+_local = threading.local()
+
+
+@contextmanager
+def progress_listener(on_progress=None, on_token=None):
+    """
+    Route report_progress / report_token calls made on this thread to the
+    given callbacks while the block runs. Without a listener both are no-ops,
+    so the regular /command path is unaffected.
+    """
+    previous = getattr(_local, "listeners", None)
+    _local.listeners = (on_progress, on_token)
+    try:
+        yield
+    finally:
+        _local.listeners = previous
+
+
+def report_progress(message: str):
+    listeners = getattr(_local, "listeners", None)
+    if listeners and listeners[0]:
+        listeners[0](message)
+
+
+def report_token(text: str):
+    listeners = getattr(_local, "listeners", None)
+    if listeners and listeners[1]:
+        listeners[1](text)
+
+
+def streaming_tokens() -> bool:
+    listeners = getattr(_local, "listeners", None)
+    return bool(listeners and listeners[1])
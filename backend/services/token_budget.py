@@ -0,0 +1,146 @@
+# services/token_budget.py
+import json
+import re
+
+# ============================ ESTIMATOR ============================
+
+# Words, numbers and single punctuation marks, roughly how BPE tokenizers split text
+_PIECES = re.compile(r"\w+|[^\w\s]")
+
+# Per-message overhead of the chat format (role markers, separators)
+MESSAGE_OVERHEAD_TOKENS = 4
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Fast local token estimate, no tokenizer download or network call.
+    Common words count as one token; long words and numbers as one token
+    per ~6 characters.
+    """
+    if not text:
+        return 0
+    return sum(1 + (len(piece) - 1) // 6 for piece in _PIECES.findall(text))
+
+
+def message_tokens(message: dict) -> int:
+    return MESSAGE_OVERHEAD_TOKENS + estimate_tokens(message.get("content") or "")
+
+
+def tools_tokens(tools: list) -> int:
+    return estimate_tokens(json.dumps(tools, separators=(",", ":"))) if tools else 0
+
+# ============================ TRIMMING ============================
+
+def fit_text(text: str, max_tokens: int, marker: str = "\n...(truncated)") -> str:
+    """
+    Cut text so its estimate is at most max_tokens, keeping the beginning.
+    """
+    if estimate_tokens(text) <= max_tokens:
+        return text
+    if max_tokens <= estimate_tokens(marker):
+        return ""
+
+    budget = max_tokens - estimate_tokens(marker)
+    used = 0
+    for match in _PIECES.finditer(text):
+        used += 1 + (len(match.group()) - 1) // 6
+        if used > budget:
+            return text[:match.start()].rstrip() + marker
+    return text
+
+
+def fit_history(history: list, max_tokens: int, max_message_tokens: int) -> list:
+    """
+    Keep the most recent messages that fit; long messages are shortened and
+    dropped turns are replaced by a one-line note.
+    """
+    kept = []
+    used = 0
+
+    for message in reversed(history or []):
+        message = dict(message, content=fit_text(message.get("content") or "", max_message_tokens))
+        cost = message_tokens(message)
+        if used + cost > max_tokens:
+            break
+        kept.append(message)
+        used += cost
+
+    kept.reverse()
+
+    # Tell the model that earlier turns exist
+    dropped = len(history or []) - len(kept)
+    if dropped and kept:
+        note = {"role": "system", "content": f"({dropped} earlier messages omitted)"}
+        if used + message_tokens(note) <= max_tokens:
+            kept.insert(0, note)
+
+    return kept
+
+# ============================ PROMPT BUDGET ============================
+
+# Fixed budget per section, in estimated tokens
+SECTION_BUDGETS = {
+    "system": 500,
+    "tools": 1200,
+    "attachments": 1200,
+    "history": 1000,
+    "user": 500,
+}
+
+# Whole prompt; sections are shrunk lowest priority first until it fits
+PROMPT_BUDGET = 3500
+
+# Trimmed first → last. System prompt and tool schemas are never cut.
+TRIM_ORDER = ["history", "attachments", "user"]
+
+MAX_HISTORY_MESSAGE_TOKENS = 250
+
+
+def _section_tokens(name, value):
+    if name == "tools":
+        return tools_tokens(value)
+    if name == "history":
+        return sum(message_tokens(m) for m in value)
+    if name in ("system", "user"):
+        return message_tokens({"content": value}) if value else 0
+    return estimate_tokens(value)
+
+
+def _fit_section(name, value, max_tokens):
+    if name == "history":
+        return fit_history(value, max_tokens, MAX_HISTORY_MESSAGE_TOKENS)
+    overhead = MESSAGE_OVERHEAD_TOKENS if name in ("system", "user") else 0
+    return fit_text(value, max(0, max_tokens - overhead))
+
+
+def budget_sections(sections: dict, budgets: dict = None, total: int = PROMPT_BUDGET):
+    """
+    Fit prompt sections ({"system", "tools", "attachments", "history",
+    "user"}) into their budgets, then shrink the TRIM_ORDER sections until
+    the whole prompt is within total.
+
+    Returns (fitted sections, {section: tokens, "total": tokens}).
+    """
+    budgets = budgets or SECTION_BUDGETS
+    fitted = dict(sections)
+
+    for name in TRIM_ORDER:
+        if fitted.get(name) and _section_tokens(name, fitted[name]) > budgets[name]:
+            fitted[name] = _fit_section(name, fitted[name], budgets[name])
+
+    tokens = {name: _section_tokens(name, value) if value else 0 for name, value in fitted.items()}
+
+    overflow = sum(tokens.values()) - total
+    for name in TRIM_ORDER:
+        if overflow <= 0:
+            break
+        if not tokens[name]:
+            continue
+        target = max(0, tokens[name] - overflow)
+        fitted[name] = _fit_section(name, fitted[name], target)
+        new_tokens = _section_tokens(name, fitted[name]) if fitted[name] else 0
+        overflow -= tokens[name] - new_tokens
+        tokens[name] = new_tokens
+
+    tokens["total"] = sum(tokens.values())
+    return fitted, tokens
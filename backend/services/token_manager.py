@@ -0,0 +1,109 @@
+# services/token_manager.py
+import os
+import threading
+from datetime import datetime, timedelta, timezone
+
+from google.oauth2.credentials import Credentials
+from google.auth.transport.requests import Request as GoogleRequest
+
+TOKEN_URI = "https://oauth2.googleapis.com/token"
+
+SCOPES = [
+    "https://www.googleapis.com/auth/gmail.modify",
+    "https://www.googleapis.com/auth/calendar",
+    "https://www.googleapis.com/auth/userinfo.email",
+    "https://www.googleapis.com/auth/userinfo.profile",
+    "openid"
+]
+
+# Refresh this long before Google's reported expiry so a token never
+# expires in the middle of a request
+REFRESH_MARGIN = timedelta(minutes=5)
+
+
+def _utcnow():
+    # google-auth stores expiry as a naive UTC datetime
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+class TokenManager:
+    """
+    Process-wide cache of Google credentials, one object per user.
+
+    Access tokens are reused until REFRESH_MARGIN before expiry. Refreshes
+    are single-flight per user: concurrent callers wait for the refresh in
+    progress instead of each hitting the token endpoint.
+    """
+
+    def __init__(self, refresh_margin: timedelta = REFRESH_MARGIN):
+        self.refresh_margin = refresh_margin
+        self._credentials = {}
+        self._locks = {}
+        self._guard = threading.Lock()
+
+    def _lock_for(self, email: str):
+        with self._guard:
+            return self._locks.setdefault(email, threading.Lock())
+
+    def _is_fresh(self, creds) -> bool:
+        if creds is None or not creds.token or creds.expiry is None:
+            return False
+        return creds.expiry - self.refresh_margin > _utcnow()
+
+    def _build(self, email: str):
+        from db import get_refresh_token  # avoid circular import
+
+        refresh_token = get_refresh_token(email)
+        if not refresh_token:
+            raise Exception(f"No credentials found for user: {email}")
+
+        client_id = os.environ.get("GOOGLE_CLIENT_ID")
+        client_secret = os.environ.get("GOOGLE_CLIENT_SECRET")
+
+        if not client_id or not client_secret:
+            raise Exception("Google OAuth credentials not configured")
+
+        return Credentials(
+            token=None,
+            refresh_token=refresh_token,
+            token_uri=TOKEN_URI,
+            client_id=client_id,
+            client_secret=client_secret,
+            scopes=SCOPES
+        )
+
+    def get_credentials(self, email: str):
+        creds = self._credentials.get(email)
+        if self._is_fresh(creds):
+            return creds
+
+        with self._lock_for(email):
+            # Another request may have refreshed while we waited
+            creds = self._credentials.get(email)
+            if self._is_fresh(creds):
+                return creds
+
+            if creds is None:
+                creds = self._build(email)
+
+            creds.refresh(GoogleRequest())
+            self._credentials[email] = creds
+            return creds
+
+    def invalidate(self, email: str):
+        """
+        Drop the cached credentials, e.g. after the user re-authenticates.
+        """
+        with self._lock_for(email):
+            self._credentials.pop(email, None)
+
+
+token_manager = TokenManager()
+
+
+def get_credentials_for_user(email: str):
+    """
+    Get Google credentials for a specific user using their refresh token from DB.
+    The access token is cached and refreshed shortly before it expires.
+    """
+    return token_manager.get_credentials(email)
@@ -259,22 +259,25 @@ function speak(text) {
 }
 
 // ===================== CHAT HELPERS =====================
-function addMessage(text, type) {
-    const div = document.createElement("div");
-    div.className = `message ${type}`;
-
-    const html = text
+function renderMessage(div, text) {
+    div.innerHTML = text
         .split("\n\n")
         .map(p => `<p>${p.replace(/\n/g, "<br>")}</p>`)
         .join("");
+    chatMessages.scrollTop = chatMessages.scrollHeight;
+}
 
-    div.innerHTML = html;
+function addMessage(text, type) {
+    const div = document.createElement("div");
+    div.className = `message ${type}`;
     chatMessages.appendChild(div);
-    chatMessages.scrollTop = chatMessages.scrollHeight;
+    renderMessage(div, text);
 
     if (type === "bot" && speechUnlocked) {
         speak(text);
     }
+
+    return div;
 }
 
 function showThinking() {
@@ -296,6 +299,11 @@ function removeThinking() {
     if (t) t.remove();
 }
 
+function setThinkingText(text) {
+    const label = document.querySelector("#thinking p");
+    if (label) label.textContent = `${text}...`;
+}
+
 // ===================== MODE SWITCHING =====================
 function switchMode(mode) {
     console.log("Switching to mode:", mode);
@@ -580,6 +588,35 @@ if (cancelSendBtn) {
 }
 
 // ===================== SEND COMMAND =====================
+// Parse a Server-Sent Events response body, calling onEvent(event, data)
+async function readEventStream(res, onEvent) {
+    const reader = res.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = "";
+
+    while (true) {
+        const { value, done } = await reader.read();
+        if (done) break;
+
+        buffer += decoder.decode(value, { stream: true });
+
+        let boundary;
+        while ((boundary = buffer.indexOf("\n\n")) !== -1) {
+            const block = buffer.slice(0, boundary);
+            buffer = buffer.slice(boundary + 2);
+
+            let event = "message";
+            let data = "";
+            for (const line of block.split("\n")) {
+                if (line.startsWith("event:")) event = line.slice(6).trim();
+                else if (line.startsWith("data:")) data += line.slice(5).trim();
+            }
+
+            if (data) onEvent(event, JSON.parse(data));
+        }
+    }
+}
+
 async function sendCommand() {
     const command = input.value.trim();
     if (!command) return;
@@ -594,7 +631,7 @@ async function sendCommand() {
     const trimmedHistory = conversationHistory.slice(-10);
 
     try {
-        const res = await fetch(`${BACKEND_URL}/command`, {
+        const res = await fetch(`${BACKEND_URL}/command/stream`, {
             method: "POST",
             headers: { "Content-Type": "application/json" },
             body: JSON.stringify({
@@ -613,11 +650,37 @@ async function sendCommand() {
             throw new Error(`HTTP ${res.status}`);
         }
 
-        const data = await res.json();
+        // Reply text appears as tokens arrive; "done" carries the final reply
+        let botDiv = null;
+        let streamed = "";
+        let data = null;
+
+        await readEventStream(res, (event, payload) => {
+            if (event === "progress") {
+                setThinkingText(payload.message);
+            } else if (event === "token") {
+                if (!botDiv) {
+                    removeThinking();
+                    botDiv = document.createElement("div");
+                    botDiv.className = "message bot";
+                    chatMessages.appendChild(botDiv);
+                }
+                streamed += payload.text;
+                renderMessage(botDiv, streamed);
+            } else if (event === "done" || event === "error") {
+                data = payload;
+            }
+        });
+
         removeThinking();
 
-        if (typeof data.reply === "string") {
-            addMessage(data.reply, "bot");
+        if (data && typeof data.reply === "string") {
+            if (botDiv) {
+                renderMessage(botDiv, data.reply);
+                if (speechUnlocked) speak(data.reply);
+            } else {
+                addMessage(data.reply, "bot");
+            }
             conversationHistory.push({ role: "assistant", content: data.reply });
         } else {
             addMessage("Something went wrong, but I'm still alive 👀", "bot");